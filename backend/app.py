@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
@@ -10,11 +10,23 @@ from datetime import datetime, timedelta
 import traceback
 import warnings
 import os
+import time
+import uuid
+import hashlib
+import copy
+from collections import namedtuple
 from sklearn.linear_model import Ridge
 from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import cross_val_score
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from functools import lru_cache
+from pandas.errors import EmptyDataError
+from cache import SingleFlightCache
+from selection import constrain_weights, select_tracking_portfolio
+import stability
+import tuning
+from responses import cached_response, compress_response, date_list, encode, representation, to_list, wants_columnar
+from static_files import StaticManifest
+from symbols import ALLOWED_CURRENCIES, SymbolDirectory, SymbolScreen, screen_csv
 
 warnings.filterwarnings('ignore')
 
@@ -28,7 +40,14 @@ print(f"🔍 Backend directory: {BACKEND_DIR}")
 print(f"📁 Looking for React build at: {BUILD_FOLDER}")
 print(f"✓ Build folder exists: {os.path.exists(BUILD_FOLDER)}")
 
-app = Flask(__name__, static_folder=BUILD_FOLDER, static_url_path='')
+# The build folder only changes on deploy, so inspect it once at startup
+BUILD_EXISTS = os.path.exists(BUILD_FOLDER)
+BUILD_MANIFEST = StaticManifest(BUILD_FOLDER)
+# Identifies this server process; a restart invalidates liveness ETags
+BOOT_ID = uuid.uuid4().hex[:12]
+
+# Build files are served from BUILD_MANIFEST by the catch-all route, not Flask's static route
+app = Flask(__name__, static_folder=None)
 CORS(app, resources={
     r"/api/*": {
         "origins": "*",
@@ -37,9 +56,76 @@ CORS(app, resources={
         "supports_credentials": False
     }
 })
+app.after_request(compress_response)
+
+# Supported bar frequencies and the pandas resample rule used to derive them.
+# Only daily bars are ever downloaded; weekly and monthly bars are resampled
+# locally from the cached daily matrix (last close of each period).
+FREQUENCIES = {
+    '1d': None,
+    '1wk': 'W-FRI',
+    '1mo': 'MS',
+}
+
+# Benchmark and FX symbols fetched alongside the stock universe
+SP500_SYMBOL = '^GSPC'
+TSX_SYMBOL = 'XIU.TO'
+FX_SYMBOL = 'CADUSD=X'
+
+# Parameters a request may override without touching the shared analyzer
+OVERRIDABLE_PARAMS = (
+    'start_date', 'end_date', 'backtest_start', 'backtest_end', 'frequency',
+    'market_value_weight', 'returns_weight', 'tracking_error_weight',
+    'ridge_alpha', 'selection_alpha',
+)
+DATE_PARAMS = ('start_date', 'end_date', 'backtest_start', 'backtest_end')
+
+# Rating weights and Ridge penalties; replaced as a whole (never mutated) so a
+# tuned config swaps in atomically while requests are reading it
+ScoringConfig = namedtuple('ScoringConfig', [
+    'market_value_weight', 'returns_weight', 'tracking_error_weight',
+    'ridge_alpha', 'selection_alpha',
+])
+
+# Bound on concurrent Yahoo Finance lookups across all requests in this process
+SCREENING_WORKERS = int(os.environ.get('SCREENING_WORKERS', 10))
+
+# Cache bounds: request overrides put arbitrary date windows in the cache
+# keys, so least recently used windows are evicted past these limits
+MARKET_DATA_CACHE_ENTRIES = int(os.environ.get('MARKET_DATA_CACHE_ENTRIES', 8))
+DAILY_CLOSE_CACHE_BYTES = int(os.environ.get('DAILY_CLOSE_CACHE_MB', 256)) * 1024 * 1024
+MARKET_CAP_CACHE_ENTRIES = 50000
+
+# /api/tune runs inside a request thread: keep it small and in-process by
+# default. Bigger searches belong in the tuning.py CLI.
+TUNE_MAX_WORKERS = int(os.environ.get('TUNE_MAX_WORKERS', 2))
+TUNE_MAX_ITER = 1000
+TUNE_MAX_ALPHAS = 50
+
+def _scoring_value(param, value):
+    """Validated float for a ScoringConfig field: finite, alphas > 0, weights >= 0"""
+    if isinstance(value, bool):
+        raise ValueError(f"{param} must be a number")
+    value = float(value)
+    if not np.isfinite(value):
+        raise ValueError(f"{param} must be finite")
+    if param.endswith('_alpha') and value <= 0:
+        raise ValueError(f"{param} must be greater than 0")
+    if value < 0:
+        raise ValueError(f"{param} must not be negative")
+    return value
 
 class MarketMatchAnalyzer:
-    def __init__(self):
+    """
+    Screening, rating, weighting and backtesting pipeline.
+
+    One instance is shared by all request threads: its caches are
+    SingleFlightCache objects and network lookups run on one bounded,
+    process-wide executor. Per-request parameters go through
+    with_overrides(), which returns a view sharing those resources.
+    """
+
+    def __init__(self, symbol_directory=None, max_workers=SCREENING_WORKERS):
         # Training period: used to compute scores and select stocks (2021-2024)
         self.start_date = '2021-01-01'
         self.end_date = '2024-11-02'
@@ -47,14 +133,178 @@ class MarketMatchAnalyzer:
         # Kept completely separate from training to avoid look-ahead bias
         self.backtest_start = '2018-01-01'
         self.backtest_end = '2020-12-31'
-        self.market_value_weight = 1
-        self.returns_weight = 0.001
-        self.tracking_error_weight = 0.1
+        # Ridge penalties: ridge_alpha is on standardised returns (calculate_weights);
+        # selection_alpha only approximates that scale (see select_tracking_portfolio)
+        self.scoring = ScoringConfig(
+            market_value_weight=1, returns_weight=0.001, tracking_error_weight=0.1,
+            ridge_alpha=0.1, selection_alpha=0.1
+        )
         self.total_market_value = 50578000000000
-        # Cache for market data
-        self._market_data_cache = None
-        self._market_returns_cache = None
-        
+        # Default bar frequency for rating, weighting and backtesting
+        self.frequency = '1mo'
+        # Market data snapshots keyed by (frequency, start, end); each entry is
+        # (combined, sp500, tsx, mean market return, content hash)
+        self._market_data_cache = SingleFlightCache(max_size=MARKET_DATA_CACHE_ENTRIES)
+        # Daily closes keyed by (symbol, start, end); float32 to keep the
+        # ~20x larger daily matrices cheap to hold. Bounded by bytes.
+        self._daily_close_cache = SingleFlightCache(
+            max_size=DAILY_CLOSE_CACHE_BYTES, sizeof=lambda series: series.memory_usage(index=True)
+        )
+        # Market caps keyed by symbol (failed lookups are not cached)
+        self._market_cap_cache = SingleFlightCache(max_size=MARKET_CAP_CACHE_ENTRIES)
+        # Shared by every request so concurrent screening can't oversubscribe threads
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='marketmatch')
+        # Local symbol index: exchange/currency/status, also caches live lookups
+        self.symbols = symbol_directory if symbol_directory is not None else SymbolDirectory()
+
+    market_value_weight = property(lambda self: self.scoring.market_value_weight)
+    returns_weight = property(lambda self: self.scoring.returns_weight)
+    tracking_error_weight = property(lambda self: self.scoring.tracking_error_weight)
+    ridge_alpha = property(lambda self: self.scoring.ridge_alpha)
+    selection_alpha = property(lambda self: self.scoring.selection_alpha)
+
+    def with_overrides(self, **overrides):
+        """
+        Request-scoped copy with its own dates/weights/frequency.
+
+        Caches, executor and symbol directory are shared with self; nothing
+        on self is modified. Unknown or malformed overrides raise ValueError.
+        """
+        unknown = set(overrides) - set(OVERRIDABLE_PARAMS)
+        if unknown:
+            raise ValueError(f"Unknown override(s): {', '.join(sorted(unknown))}")
+        view = copy.copy(self)
+        scoring = {}
+        for param, value in overrides.items():
+            if value is None:
+                continue
+            if param in DATE_PARAMS:
+                setattr(view, param, pd.Timestamp(value).strftime('%Y-%m-%d'))
+            elif param == 'frequency':
+                view.frequency = self._resolve_frequency(value)
+            else:
+                scoring[param] = _scoring_value(param, value)
+        view.scoring = self.scoring._replace(**scoring)
+        return view
+
+    def clear_cache(self):
+        """Drop cached market data and prices"""
+        self._market_data_cache.clear()
+        self._daily_close_cache.clear()
+        self._market_cap_cache.clear()
+
+    def evict_closes(self, symbols):
+        """Drop cached daily closes for symbols, e.g. after a batch chunk is rated"""
+        symbols = set(symbols)
+        self._daily_close_cache.discard([key for key in self._daily_close_cache.keys() if key[0] in symbols])
+
+    def apply_config(self, config):
+        """
+        Apply a tuned configuration (see tuning.py) as one atomic swap of the scoring parameters.
+
+        Only ridge_alpha is tuned. selection_alpha penalises the raw,
+        uncentred returns matrix on a different scale, so it is left alone.
+        """
+        values = {param: _scoring_value(param, config[param]) for param in tuning.RATING_PARAMS if param in config}
+        if 'ridge_alpha' in config:
+            values['ridge_alpha'] = _scoring_value('ridge_alpha', config['ridge_alpha'])
+        self.scoring = self.scoring._replace(**values)
+
+    def _resolve_frequency(self, frequency):
+        """Return a validated bar frequency, defaulting to the analyzer's"""
+        frequency = frequency or self.frequency
+        if frequency not in FREQUENCIES:
+            raise ValueError(f"Unsupported frequency '{frequency}' (expected one of {', '.join(FREQUENCIES)})")
+        return frequency
+
+    def _download_daily_closes(self, symbols, start_date, end_date):
+        """Download daily closes for symbols in one bulk call (individual fallback)"""
+        try:
+            closes = yf.download(
+                symbols,
+                start=start_date,
+                end=end_date,
+                interval='1d',
+                auto_adjust=True,
+                progress=False
+            )['Close']
+            if isinstance(closes, pd.Series):
+                closes = closes.to_frame(symbols[0])
+            return {symbol: closes[symbol] for symbol in symbols if symbol in closes.columns}
+        except Exception as e:
+            print(f"Bulk download failed: {e}, falling back to individual fetches")
+
+        result = {}
+        for i, symbol in enumerate(symbols):
+            if i > 0:
+                time.sleep(0.15)
+            try:
+                px = yf.Ticker(symbol).history(start=start_date, end=end_date, interval='1d')
+                if not px.empty:
+                    result[symbol] = px['Close']
+            except Exception as e:
+                print(f"Error fetching {symbol}: {str(e)}")
+        return result
+
+    def _fetch_daily_closes(self, keys):
+        """
+        Fill function for the daily close cache: keys are (symbol, start, end).
+
+        Symbols that failed or came back all-NaN (yfinance does this per
+        symbol when rate-limited) are left out, so they are not cached and
+        the next request downloads them again.
+        """
+        by_window = {}
+        for symbol, start_date, end_date in keys:
+            by_window.setdefault((start_date, end_date), []).append(symbol)
+
+        result = {}
+        for (start_date, end_date), symbols in by_window.items():
+            print(f"📥 Fetching daily closes for {len(symbols)} symbols ({start_date} → {end_date})...")
+            fetched = self._download_daily_closes(symbols, start_date, end_date)
+            for symbol in symbols:
+                series = fetched.get(symbol)
+                if series is None:
+                    continue
+                series = series.dropna().astype('float32')
+                if series.empty:
+                    continue
+                if series.index.tz is not None:
+                    series.index = series.index.tz_localize(None)
+                series.index = series.index.normalize()
+                result[(symbol, start_date, end_date)] = series[~series.index.duplicated(keep='last')]
+        return result
+
+    def get_daily_closes(self, symbols, start_date, end_date):
+        """
+        Daily close matrix (dates x symbols) for the requested window.
+
+        Each symbol is downloaded at most once per window, even across
+        concurrent requests; later calls for any frequency are served from
+        the cache. Symbols without data are omitted.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        keys = [(s, start_date, end_date) for s in symbols]
+        cached = self._daily_close_cache.get_many(keys, self._fetch_daily_closes)
+
+        columns = {key[0]: cached[key] for key in keys if cached[key] is not None}
+        if not columns:
+            return pd.DataFrame()
+        return pd.concat(columns, axis=1).sort_index()
+
+    def get_closes(self, symbols, start_date, end_date, frequency=None):
+        """Close matrix at the requested frequency, resampled from cached daily bars"""
+        rule = FREQUENCIES[self._resolve_frequency(frequency)]
+        closes = self.get_daily_closes(symbols, start_date, end_date)
+        if rule is None or closes.empty:
+            return closes
+        return closes.resample(rule).last().dropna(how='all')
+
+    def get_returns(self, symbols, start_date, end_date, frequency=None):
+        """Simple returns per period; the leading row of each column is NaN"""
+        closes = self.get_closes(symbols, start_date, end_date, frequency)
+        return closes.ffill().pct_change(fill_method=None)
+
     def count_volume(self, ticker):
         """Calculate average volume - simplified for performance"""
         try:
@@ -71,13 +321,22 @@ class MarketMatchAnalyzer:
             print(f"Error calculating volume for {ticker.ticker}: {str(e)}")
             return 0
     
+    def get_currency(self, ticker_symbol):
+        """Trading currency from the symbol directory, falling back to a live lookup"""
+        currency = self.symbols.currency(ticker_symbol)
+        if currency is None:
+            info = yf.Ticker(ticker_symbol).info
+            currency = info.get('currency', 'USD')
+            self.symbols.remember(ticker_symbol, info.get('exchange', ''), currency)
+        return currency
+
     def _check_single_ticker(self, ticker_symbol):
         """Check a single ticker - helper for parallel processing"""
         try:
             ticker = yf.Ticker(ticker_symbol)
             
-            # Get basic info and recent history in one call
-            info = ticker.info
+            # Currency comes from the local directory when known (saves the info call)
+            currency = self.symbols.currency(ticker_symbol)
             history = ticker.history(period='1mo')
             
             # Checking if it is delisted or has no recent data
@@ -85,8 +344,11 @@ class MarketMatchAnalyzer:
                 return (False, f"{ticker_symbol} - delisted or no recent data (got {len(history)} days)")
             
             # Check if the currency is in USD or CAD
-            currency = info.get('currency', 'Unknown')
-            if currency not in ['USD', 'CAD']:
+            if currency is None:
+                info = ticker.info
+                currency = info.get('currency', 'Unknown')
+                self.symbols.remember(ticker_symbol, info.get('exchange', ''), currency)
+            if currency not in ALLOWED_CURRENCIES:
                 return (False, f"{ticker_symbol} - wrong currency ({currency})")
             
             # Quick volume check using recent average
@@ -101,245 +363,206 @@ class MarketMatchAnalyzer:
             return (False, f"{ticker_symbol} - error: {str(e)}")
     
     def remove_unwanted(self, tickers_list):
-        """Filter out unwanted stocks - parallel processing version"""
+        """Filter out unwanted stocks - local directory check, then parallel network checks"""
         filtered_tickers = []
         removed_stocks = []
         
-        print(f"🔍 Starting parallel filtering of {len(tickers_list)} tickers...")
+        # Unknown, delisted and wrong-currency symbols are rejected without any fetch
+        to_check = []
+        for ticker in tickers_list:
+            reason = self.symbols.validate(ticker)
+            if reason is None:
+                to_check.append(ticker)
+            else:
+                removed_stocks.append(f"{ticker} - {reason}")
+        if removed_stocks:
+            print(f"📒 Symbol directory rejected {len(removed_stocks)} tickers before fetching")
+        
+        print(f"🔍 Starting parallel filtering of {len(to_check)} tickers...")
         
-        # Use ThreadPoolExecutor for parallel processing
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            future_to_ticker = {executor.submit(self._check_single_ticker, ticker): ticker 
-                              for ticker in tickers_list}
+        # Checks run on the shared, bounded executor rather than a per-request pool
+        future_to_ticker = {self._executor.submit(self._check_single_ticker, ticker): ticker 
+                          for ticker in to_check}
+        
+        for i, future in enumerate(as_completed(future_to_ticker)):
+            if i % 5 == 0:
+                print(f"📊 Processed {i}/{len(to_check)} tickers...")
             
-            for i, future in enumerate(as_completed(future_to_ticker)):
-                if i % 5 == 0:
-                    print(f"📊 Processed {i}/{len(tickers_list)} tickers...")
-                
-                passed, result = future.result()
-                if passed:
-                    filtered_tickers.append(result)
-                    print(f"   ✅ {result} passed")
-                else:
-                    removed_stocks.append(result)
-                    print(f"   ❌ {result}")
+            passed, result = future.result()
+            if passed:
+                filtered_tickers.append(result)
+                print(f"   ✅ {result} passed")
+            else:
+                removed_stocks.append(result)
+                print(f"   ❌ {result}")
         
         print(f"\n✅ Filtering complete: {len(filtered_tickers)} accepted, {len(removed_stocks)} removed")
         return filtered_tickers, removed_stocks
     
-    def get_market_data(self):
-        """Get S&P 500 and TSX 60 data - cached version"""
-        if self._market_data_cache is not None:
-            print("📦 Using cached market data")
-            return self._market_data_cache
-            
+    def _build_market_data(self, frequency):
+        """Fetch and assemble one market data snapshot (cache fill function)"""
         try:
             print("📥 Fetching market data (will be cached)...")
+            # Closes are cached as float32; round after widening so payloads carry no float noise
+            closes = self.get_closes([SP500_SYMBOL, TSX_SYMBOL], self.start_date, self.end_date, frequency)
+
             # S&P 500
-            sp500_ticker = yf.Ticker('^GSPC')
-            sp500 = sp500_ticker.history(start=self.start_date, end=self.end_date, interval='1mo')[['Close']]
-            sp500.index = pd.to_datetime(sp500.index).strftime('%Y-%m-%d')
+            sp500 = closes[[SP500_SYMBOL]].dropna().astype('float64').round(4).rename(columns={SP500_SYMBOL: 'Close'})
+            sp500.index = sp500.index.strftime('%Y-%m-%d')
             sp500_returns = sp500.ffill().pct_change().dropna()
             
             # TSX 60
-            tsx_ticker = yf.Ticker('XIU.TO')
-            tsx = tsx_ticker.history(start=self.start_date, end=self.end_date, interval='1mo')[['Close']]
-            tsx.index = pd.to_datetime(tsx.index).strftime('%Y-%m-%d')
+            tsx = closes[[TSX_SYMBOL]].dropna().astype('float64').round(4).rename(columns={TSX_SYMBOL: 'Close'})
+            tsx.index = tsx.index.strftime('%Y-%m-%d')
             tsx_returns = tsx.ffill().pct_change().dropna()
             
             # Combine
             combined = sp500_returns.join(tsx_returns, lsuffix='_SP500', rsuffix='_TSX')
             combined['Total_Returns'] = combined.mean(axis=1)
             
-            # Cache it
-            self._market_data_cache = (combined, sp500, tsx)
-            self._market_returns_cache = combined['Total_Returns'].mean()
+            # Version by content so every worker derives the same ETag
+            digest = hashlib.sha1()
+            for frame in (combined, sp500, tsx):
+                digest.update(pd.util.hash_pandas_object(frame).values.tobytes())
             
-            return combined, sp500, tsx
+            return combined, sp500, tsx, combined['Total_Returns'].mean(), digest.hexdigest()[:16]
         except Exception as e:
             raise Exception(f"Error getting market data: {str(e)}")
+
+    def _market_snapshot(self, frequency=None):
+        """Cached (combined, sp500, tsx, market return, version) for this analyzer's window"""
+        frequency = self._resolve_frequency(frequency)
+        key = (frequency, self.start_date, self.end_date)
+        if key in self._market_data_cache:
+            print("📦 Using cached market data")
+        return self._market_data_cache.get(key, lambda: self._build_market_data(frequency))
+
+    def get_market_data(self, frequency=None):
+        """Get S&P 500 and TSX 60 data - cached version"""
+        combined, sp500, tsx, _, _ = self._market_snapshot(frequency)
+        return combined, sp500, tsx
     
-    def rate_stocks(self, tickers_list):
-        """Rate stocks based on market cap, returns, and tracking error - optimized with bulk fetching"""
-        # Use cached market returns if available
-        if self._market_returns_cache is not None:
-            market_returns = self._market_returns_cache
-            print("📦 Using cached market returns")
-        else:
-            market_data, _, _ = self.get_market_data()
-            market_returns = market_data['Total_Returns'].mean()
+    def market_data_version(self, frequency=None):
+        """Content hash of the cached market data snapshot (fetching it if needed)"""
+        return self._market_snapshot(frequency)[4]
+
+    def _fetch_market_caps(self, symbols):
+        """Fill function for the market cap cache; lookups run on the shared executor"""
+        def lookup(symbol):
+            try:
+                return yf.Ticker(symbol).fast_info.get('marketCap', 0) or 0
+            except Exception as e:
+                print(f"Error processing {symbol}: {str(e)}")
+                return None
+        # Failed lookups are left out so the next request retries them
+        caps = zip(symbols, self._executor.map(lookup, symbols))
+        return {symbol: cap for symbol, cap in caps if cap is not None}
+
+    def rate_stocks(self, tickers_list, frequency=None):
+        """Rate stocks based on market cap, returns, and tracking error - vectorized over one returns matrix"""
+        frequency = self._resolve_frequency(frequency)
+        scoring = self.scoring
+        market_returns = self._market_snapshot(frequency)[3]
         
-        ratings_data = []
+        # One returns matrix for the whole universe (daily bars fetched once)
+        print(f"📥 Loading {frequency} returns for {len(tickers_list)} stocks...")
+        returns = self.get_returns(tickers_list, self.start_date, self.end_date, frequency)
+        if returns.empty:
+            return pd.DataFrame()
+        returns = returns.loc[:, returns.count() > 0]
+
+        # Returns and tracking error scores, computed column-wise
+        stock_returns = returns.mean()
+        returns_diff = (stock_returns - market_returns).abs()
+        returns_scores = (1 / returns_diff).where(returns_diff > 0, 0)
+        tracking_errors = (returns - market_returns).std()
+        tracking_error_scores = (1 / tracking_errors).where(tracking_errors > 0, 0)
         
-        # Bulk fetch all stock data at once to reduce API calls
-        print(f"📥 Bulk fetching price data for {len(tickers_list)} stocks...")
-        try:
-            bulk_prices = yf.download(
-                tickers_list, 
-                start=self.start_date, 
-                end=self.end_date, 
-                interval='1mo',
-                auto_adjust=True,
-                progress=False,
-                group_by='ticker'
-            )
-        except Exception as e:
-            print(f"Bulk download failed: {e}, falling back to individual fetches")
-            bulk_prices = None
+        market_caps = self._market_cap_cache.get_many(list(returns.columns), self._fetch_market_caps)
         
-        for i, ticker_symbol in enumerate(tickers_list):
-            # Minimal delay only if bulk fetch failed
-            if bulk_prices is None and i > 0:
-                time.sleep(0.15)
-            
-            try:
-                # Try to use bulk data first
-                if bulk_prices is not None:
-                    if len(tickers_list) == 1:
-                        stock_data = bulk_prices[['Close']].copy()
-                    else:
-                        try:
-                            stock_data = bulk_prices[ticker_symbol][['Close']].copy()
-                        except (KeyError, TypeError):
-                            # Fallback to individual fetch
-                            stock_data = yf.Ticker(ticker_symbol).history(
-                                start=self.start_date, end=self.end_date, interval='1mo'
-                            )[['Close']]
-                else:
-                    stock_data = yf.Ticker(ticker_symbol).history(
-                        start=self.start_date, end=self.end_date, interval='1mo'
-                    )[['Close']]
-                
-                if stock_data.empty:
-                    continue
-                
-                stock_returns_df = stock_data.ffill().pct_change().dropna()
-                
-                # Get market cap (still needs individual call for info)
-                ticker = yf.Ticker(ticker_symbol)
-                market_cap = ticker.fast_info.get('marketCap', 0)
-                market_value_score = market_cap / self.total_market_value if market_cap else 0
-                
-                # Returns score
-                stock_returns = stock_returns_df['Close'].mean()
-                returns_diff = abs(stock_returns - market_returns)
-                returns_score = 1 / returns_diff if returns_diff > 0 else 0
-                
-                # Tracking error score
-                tracking_error = (stock_returns_df['Close'] - market_returns).std()
-                tracking_error_score = 1 / tracking_error if tracking_error > 0 else 0
-                
-                # Overall rating
-                rating = (market_value_score * self.market_value_weight + 
-                         returns_score * self.returns_weight + 
-                         tracking_error_score * self.tracking_error_weight)
-                
-                ratings_data.append({
-                    'Ticker': ticker_symbol,
-                    'Market_Value_Score': market_value_score,
-                    'Returns_Score': returns_score,
-                    'Tracking_Error_Score': tracking_error_score,
-                    'Rating': rating,
-                    'Market_Cap': market_cap,
-                    'Stock_Returns': stock_returns,
-                    'Tracking_Error': tracking_error
-                })
-                
-            except Exception as e:
-                print(f"Error processing {ticker_symbol}: {str(e)}")
+        ratings_data = []
+        for ticker_symbol in returns.columns:
+            market_cap = market_caps[ticker_symbol]
+            if market_cap is None:
                 continue
+            market_value_score = market_cap / self.total_market_value if market_cap else 0
+            
+            returns_score = float(returns_scores[ticker_symbol])
+            tracking_error_score = float(tracking_error_scores[ticker_symbol])
+            
+            # Overall rating
+            rating = (market_value_score * scoring.market_value_weight + 
+                     returns_score * scoring.returns_weight + 
+                     tracking_error_score * scoring.tracking_error_weight)
+            
+            ratings_data.append({
+                'Ticker': ticker_symbol,
+                'Market_Value_Score': market_value_score,
+                'Returns_Score': returns_score,
+                'Tracking_Error_Score': tracking_error_score,
+                'Rating': rating,
+                'Market_Cap': market_cap,
+                'Stock_Returns': float(stock_returns[ticker_symbol]),
+                'Tracking_Error': float(tracking_errors[ticker_symbol])
+            })
         
         df = pd.DataFrame(ratings_data)
         return df.sort_values(by='Rating', ascending=False) if not df.empty else df
     
-    def calculate_weights(self, selected_stocks):
+    def get_training_matrix(self, tickers, frequency=None):
+        """
+        Aligned training arrays (X, y): per-period returns of tickers (missing
+        values as 0) and of the blended S&P 500 / TSX 60 index.
+        """
+        frequency = self._resolve_frequency(frequency)
+        returns_df = self.get_returns(tickers, self.start_date, self.end_date, frequency).reindex(columns=tickers)
+        index_returns = self.get_returns(
+            [SP500_SYMBOL, TSX_SYMBOL], self.start_date, self.end_date, frequency
+        ).mean(axis=1).dropna()
+        common_idx = returns_df.index.intersection(index_returns.index)
+
+        if len(common_idx) < 6 or returns_df.empty:
+            raise ValueError("Insufficient overlapping return data for Ridge")
+
+        X = returns_df.loc[common_idx].fillna(0).to_numpy(dtype=np.float64)   # stock returns matrix
+        y = index_returns.loc[common_idx].to_numpy(dtype=np.float64)          # index returns (target)
+        return X, y
+
+    def calculate_weights(self, selected_stocks, frequency=None):
         """
         Calculate portfolio weights using Ridge Regression.
 
         Instead of hand-tuned coefficients, Ridge Regression learns the
         optimal weights that minimise tracking error against the blended
-        index over the training period (2021-2024).
+        index over the training period (2021-2024), sampled at the given
+        bar frequency (daily, weekly or monthly).
 
         Constraints applied post-regression:
         - Minimum weight : 1 / (2 * n)  — every stock contributes meaningfully
         - Maximum weight : 15%           — no single position dominates
         - Weights normalised to sum to 100%
         """
-        import time
-
         if selected_stocks.empty:
             return selected_stocks
 
+        frequency = self._resolve_frequency(frequency)
         tickers = selected_stocks['Ticker'].tolist()
         n = len(tickers)
         min_weight = 1.0 / (2 * n)
         max_weight = 0.15
 
         try:
-            # ── Fetch monthly returns for selected stocks (training period) ──
-            print(f"📥 Bulk fetching returns data for weight optimization...")
-            
-            # Try bulk fetch first
-            try:
-                bulk_data = yf.download(
-                    tickers,
-                    start=self.start_date,
-                    end=self.end_date,
-                    interval='1mo',
-                    auto_adjust=True,
-                    progress=False
-                )['Close']
-                
-                if isinstance(bulk_data, pd.Series):
-                    bulk_data = bulk_data.to_frame(tickers[0])
-                
-                returns_dict = {}
-                for symbol in tickers:
-                    if symbol in bulk_data.columns:
-                        returns_dict[symbol] = bulk_data[symbol].ffill().pct_change().dropna()
-            except Exception as e:
-                print(f"Bulk fetch failed: {e}, using individual fetches")
-                returns_dict = {}
-                for i, symbol in enumerate(tickers):
-                    if i > 0:
-                        time.sleep(0.15)
-                    try:
-                        px = yf.Ticker(symbol).history(
-                            start=self.start_date, end=self.end_date, interval='1mo'
-                        )[['Close']]
-                        if not px.empty:
-                            returns_dict[symbol] = px['Close'].ffill().pct_change().dropna()
-                    except Exception:
-                        pass
-
-            # ── Fetch blended index returns (training period) ────────────────
-            sp500_ret = yf.Ticker('^GSPC').history(
-                start=self.start_date, end=self.end_date, interval='1mo'
-            )[['Close']].ffill().pct_change().dropna()['Close']
-
-            tsx_ret = yf.Ticker('XIU.TO').history(
-                start=self.start_date, end=self.end_date, interval='1mo'
-            )[['Close']].ffill().pct_change().dropna()['Close']
-
-            index_returns = ((sp500_ret + tsx_ret.reindex(sp500_ret.index).ffill()) / 2).dropna()
-
-            # ── Build aligned returns matrix ─────────────────────────────────
-            returns_df = pd.DataFrame(returns_dict)
-            common_idx = returns_df.index.intersection(index_returns.index)
-
-            if len(common_idx) < 6 or returns_df.empty:
-                raise ValueError("Insufficient overlapping return data for Ridge")
-
-            X = returns_df.loc[common_idx].fillna(0).values   # stock returns matrix
-            y = index_returns.loc[common_idx].values           # index returns (target)
+            # ── Aligned returns matrix and blended index (training period) ──
+            print(f"📥 Loading {frequency} returns data for weight optimization...")
+            X, y = self.get_training_matrix(tickers, frequency)
 
             # ── Fit Ridge Regression ─────────────────────────────────────────
-            # Lower alpha allows more weight variation (less regularization)
-            # alpha=0.1 provides balance between diversification and tracking
+            # Lower alpha allows more weight variation (less regularization);
+            # the default 0.1 can be replaced by a tuned value (see tuning.py)
             scaler = StandardScaler()
             X_scaled = scaler.fit_transform(X)
 
-            ridge = Ridge(alpha=0.1, fit_intercept=False)
+            ridge = Ridge(alpha=self.ridge_alpha, fit_intercept=False)
             ridge.fit(X_scaled, y)
 
             raw_weights = ridge.coef_
@@ -350,43 +573,7 @@ class MarketMatchAnalyzer:
             print(f"   Min weight constraint: {min_weight:.6f} ({min_weight*100:.2f}%)")
             print(f"   Max weight constraint: {max_weight:.6f} ({max_weight*100:.2f}%)")
 
-            # ── Apply constraints ────────────────────────────────────────────
-            # Clip negatives to zero first (no short selling)
-            raw_weights = np.maximum(raw_weights, 0)
-            
-            # Normalize to sum to 1
-            if raw_weights.sum() > 0:
-                raw_weights = raw_weights / raw_weights.sum()
-            else:
-                # If all coefficients were negative, use equal weights
-                raw_weights = np.full(n, 1.0 / n)
-            
-            print(f"   After normalization range: [{raw_weights.min():.6f}, {raw_weights.max():.6f}]")
-
-            # Apply min/max constraints iteratively
-            for iteration in range(10):
-                # Enforce minimum
-                below_min = raw_weights < min_weight
-                if below_min.any():
-                    deficit = (min_weight - raw_weights[below_min]).sum()
-                    raw_weights[below_min] = min_weight
-                    # Reduce others proportionally to make room
-                    above_min = ~below_min
-                    if above_min.any() and raw_weights[above_min].sum() > 0:
-                        reduction_factor = (1.0 - below_min.sum() * min_weight) / raw_weights[above_min].sum()
-                        raw_weights[above_min] *= reduction_factor
-                
-                # Enforce maximum
-                above_max = raw_weights > max_weight
-                if above_max.any():
-                    raw_weights[above_max] = max_weight
-                
-                # Renormalize
-                raw_weights = raw_weights / raw_weights.sum()
-                
-                # Check convergence
-                if not below_min.any() and not above_max.any():
-                    break
+            raw_weights = constrain_weights(raw_weights, min_weight, max_weight)
 
             print(f"   Final weights range: [{raw_weights.min():.6f}, {raw_weights.max():.6f}]")
             print(f"   Final weights std: {raw_weights.std():.6f}")
@@ -431,100 +618,124 @@ class MarketMatchAnalyzer:
             df['weight_method'] = 'fallback_rating'
             return df
 
-    def backtest_portfolio(self, weighted_portfolio: pd.DataFrame, start_date: str = '2018-01-01', end_date: str = '2020-12-31') -> dict:
-        """Compute a 3-year backtest of the weighted portfolio (monthly)."""
+    def select_portfolio(self, ratings_df, num_stocks, frequency=None):
+        """
+        Choose num_stocks names and their weights jointly to minimise tracking error.
+
+        Every rated stock is a candidate, not just the top ratings. Greedy forward
+        selection plus swap search (see selection.py) picks the subset using
+        incremental Cholesky updates, and the resulting ridge coefficients go
+        through the same long-only min/max constraints as calculate_weights.
+        Returns None if the training data is insufficient.
+        """
+        frequency = self._resolve_frequency(frequency)
+        candidates = ratings_df.reset_index(drop=True)
+        tickers = candidates['Ticker'].tolist()
+
+        try:
+            print(f"📥 Loading {frequency} returns for {len(tickers)} selection candidates...")
+            X, y = self.get_training_matrix(tickers, frequency)
+        except Exception as e:
+            print(f"Tracking-error selection unavailable ({e})")
+            return None
+
+        started = time.time()
+        result = select_tracking_portfolio(X, y, num_stocks, alpha=self.selection_alpha)
+        if len(result.indices) == 0:
+            return None
+        print(f"🎯 Selected {len(result.indices)} of {len(tickers)} names in {time.time() - started:.2f}s "
+              f"({result.swaps} swaps, in-sample tracking error {result.tracking_error:.6f})")
+
+        n = len(result.indices)
+        weights = constrain_weights(result.weights, 1.0 / (2 * n), 0.15)
+        df = candidates.iloc[result.indices].reset_index(drop=True)
+        df['Weight'] = weights * 100
+        df['weight_method'] = 'tracking_error_selection'
+        return df.sort_values(by='Weight', ascending=False).reset_index(drop=True)
+
+    def weight_stability(self, tickers, frequency=None, n_resamples=2000, block_length=None,
+                         confidence=0.9, seed=0):
+        """
+        Block-bootstrap robustness of calculate_weights for the given tickers.
+
+        All resampled Ridge problems are solved in batched NumPy form (see
+        stability.py) with the analyzer's ridge_alpha and weight constraints.
+        """
+        frequency = self._resolve_frequency(frequency)
+        tickers = list(dict.fromkeys(tickers))
+        if len(tickers) > stability.MAX_TICKERS:
+            raise ValueError(f"Weight stability supports at most {stability.MAX_TICKERS} tickers, got {len(tickers)}")
+        X, y = self.get_training_matrix(tickers, frequency)
+
+        started = time.time()
+        point, weights, tracking_errors, block_length = stability.bootstrap_weights(
+            X, y, alpha=self.ridge_alpha, n_resamples=n_resamples,
+            block_length=block_length, seed=seed
+        )
+        bands, distribution = stability.summarize(tickers, point, weights, tracking_errors, confidence)
+        print(f"🎲 Solved {n_resamples} bootstrap resamples in {time.time() - started:.2f}s")
+        return {
+            "weights": bands,
+            "tracking_error": distribution,
+            "n_resamples": n_resamples,
+            "block_length": block_length,
+            "confidence": confidence,
+            "n_observations": int(len(y)),
+            "frequency": frequency
+        }
+
+    def backtest_portfolio(self, weighted_portfolio: pd.DataFrame, start_date: str = '2018-01-01', end_date: str = '2020-12-31', frequency: str = None) -> dict:
+        """Compute a 3-year backtest of the weighted portfolio at the given bar frequency."""
         try:
             if weighted_portfolio.empty:
                 return {"error": "Empty portfolio for backtest"}
 
-            # Get market indices
-            sp500_ticker = yf.Ticker('^GSPC')
-            tsx_ticker = yf.Ticker('XIU.TO')
-            sp500 = sp500_ticker.history(start=start_date, end=end_date, interval='1mo')[['Close']]
-            tsx = tsx_ticker.history(start=start_date, end=end_date, interval='1mo')[['Close']]
-            
-            # Remove timezone info to avoid tz-aware/tz-naive conflicts
-            sp500.index = sp500.index.tz_localize(None)
-            tsx.index = tsx.index.tz_localize(None)
-            
-            sp500 = sp500.ffill().dropna()
-            tsx = tsx.ffill().dropna()
+            frequency = self._resolve_frequency(frequency)
+            weights = weighted_portfolio.groupby('Ticker', sort=False)['Weight'].sum() / 100.0
+            tickers_list = weights.index.tolist()
 
-            # Normalize indices
-            sp500_idx = sp500['Close'] / sp500['Close'].iloc[0]
-            tsx_idx = tsx['Close'] / tsx['Close'].iloc[0]
-            blended_idx = (sp500_idx.reindex(tsx_idx.index).ffill().dropna() + tsx_idx) / 2
+            # Stocks, market indices and CAD/USD rate in one daily fetch, resampled locally
+            closes = self.get_closes(tickers_list + [SP500_SYMBOL, TSX_SYMBOL, FX_SYMBOL], start_date, end_date, frequency)
+            for symbol in (SP500_SYMBOL, TSX_SYMBOL, FX_SYMBOL):
+                if symbol not in closes.columns:
+                    return {"error": f"No data for {symbol} in backtest window"}
 
-            # CAD/USD exchange rate (monthly)
-            fx = yf.Ticker('CADUSD=X').history(start=start_date, end=end_date, interval='1mo')[['Close']]
-            fx.index = fx.index.tz_localize(None)
-            fx = fx.ffill().dropna()
+            sp500 = closes[SP500_SYMBOL].dropna().astype('float64')
+            tsx = closes[TSX_SYMBOL].dropna().astype('float64')
+            fx = closes[FX_SYMBOL].dropna().astype('float64')
+
+            # Normalize indices
+            sp500_idx = sp500 / sp500.iloc[0]
+            tsx_idx = tsx / tsx.iloc[0]
+            blended_idx = ((sp500_idx.reindex(tsx_idx.index).ffill() + tsx_idx) / 2).dropna()
 
             # Build portfolio index
-            portfolio_components = []
-            weights_fraction = (weighted_portfolio[['Ticker', 'Weight']].copy())
-            weights_fraction['Weight'] = weights_fraction['Weight'] / 100.0
+            components = [t for t in tickers_list if t in closes.columns]
+            px = closes[components].astype('float64').ffill()
 
-            # Fetch all tickers at once using yf.download (vectorized bulk fetch)
-            tickers_list = weights_fraction['Ticker'].tolist()
-            try:
-                bulk_px = yf.download(
-                    tickers_list, start=start_date, end=end_date,
-                    interval='1mo', auto_adjust=True, progress=False
-                )['Close']
-                if isinstance(bulk_px, pd.Series):
-                    bulk_px = bulk_px.to_frame(tickers_list[0])
-                # Remove timezone info
-                bulk_px.index = bulk_px.index.tz_localize(None)
-            except Exception:
-                bulk_px = pd.DataFrame()
-
-            for _, row in weights_fraction.iterrows():
-                ticker = row['Ticker']
-                weight = row['Weight']
+            # Convert USD-listed prices to CAD
+            usd = []
+            for ticker in components:
                 try:
-                    # Use bulk data if available, fall back to individual fetch
-                    if not bulk_px.empty and ticker in bulk_px.columns:
-                        px_series = bulk_px[ticker].dropna()
-                    else:
-                        t = yf.Ticker(ticker)
-                        px_data = t.history(start=start_date, end=end_date, interval='1mo')['Close'].dropna()
-                        # Remove timezone info
-                        px_data.index = px_data.index.tz_localize(None) if px_data.index.tz is not None else px_data.index
-                        px_series = px_data
-                    
-                    if px_series.empty:
-                        continue
-                    
-                    # Ensure px_series index is timezone-naive
-                    if hasattr(px_series.index, 'tz') and px_series.index.tz is not None:
-                        px_series.index = px_series.index.tz_localize(None)
-                    
-                    # Convert to CAD if USD
-                    t_info = yf.Ticker(ticker)
-                    currency = t_info.info.get('currency', 'USD')
-                    if currency == 'USD':
-                        joined = pd.DataFrame({'Close': px_series}).join(fx, how='inner', rsuffix='_FX')
-                        if joined.empty:
-                            continue
-                        price_cad = joined['Close'] / joined['Close_FX']
-                    else:
-                        price_cad = px_series
-                    norm = price_cad / price_cad.iloc[0]
-                    portfolio_components.append(norm * weight)
+                    if self.get_currency(ticker) == 'USD':
+                        usd.append(ticker)
                 except Exception as e:
                     print(f"Backtest: error processing {ticker}: {e}")
-                    continue
+            if usd:
+                px[usd] = px[usd].div(fx.reindex(px.index).ffill(), axis=0)
 
-            if not portfolio_components:
+            # Only dates where every component has a price, so a late starter
+            # (e.g. an IPO inside the window) can't add its weight mid-series
+            px = px.dropna(axis=1, how='all').dropna(how='any')
+            if px.empty:
                 return {"error": "No valid components for backtest"}
 
+            # Each component normalized to the first common date, then weighted
+            norm = px / px.iloc[0]
+            portfolio_components = norm.mul(weights[px.columns], axis=1)
+
             # Sum weighted components
-            portfolio_index = portfolio_components[0]
-            for comp in portfolio_components[1:]:
-                portfolio_index = portfolio_index.reindex(comp.index).ffill()
-                comp = comp.reindex(portfolio_index.index).ffill()
-                portfolio_index = (portfolio_index.ffill() + comp.ffill())
+            portfolio_index = portfolio_components.sum(axis=1)
 
             # Normalize portfolio index to start at 1
             portfolio_index = portfolio_index / portfolio_index.iloc[0]
@@ -540,9 +751,9 @@ class MarketMatchAnalyzer:
             correlation = float(np.corrcoef(portfolio_index.values, blended_idx.values)[0, 1])
 
             return {
-                "dates": [d.strftime('%Y-%m-%d') if not isinstance(d, str) else d for d in common_index],
-                "portfolio_index": [float(x) for x in portfolio_index.values],
-                "blended_index": [float(x) for x in blended_idx.values],
+                "dates": date_list(common_index),
+                "portfolio_index": to_list(portfolio_index.values),
+                "blended_index": to_list(blended_idx.values),
                 "portfolio_return_pct": round(portfolio_return, 4),
                 "blended_return_pct": round(blended_return, 4),
                 "correlation": round(correlation, 4)
@@ -594,7 +805,7 @@ class MarketMatchAnalyzer:
                         continue
                     price = stock_data.iloc[0]['Close']
 
-                currency = ticker_obj.info.get('currency', 'USD')
+                currency = self.get_currency(ticker_sym)
                 weight = row['Weight'] / 100
 
                 # Convert to CAD using vectorized operation
@@ -630,24 +841,72 @@ class MarketMatchAnalyzer:
         
         return pd.DataFrame(portfolio_result), total_fees
 
-analyzer = MarketMatchAnalyzer()
+symbol_directory = SymbolDirectory()
+if not symbol_directory.authoritative:
+    print("\n" + "!"*60)
+    print(f"⚠️  NO SYMBOL DIRECTORY at {symbol_directory.path}")
+    print("   Unknown tickers are not rejected before Yahoo Finance lookups.")
+    print("   Run 'python symbols.py download' (build.sh does this) to create it.")
+    print("!"*60 + "\n")
+analyzer = MarketMatchAnalyzer(symbol_directory)
+
+# Load the best configuration from the last tuning run, if any
+_tuned = tuning.load_config()
+if _tuned is not None:
+    analyzer.apply_config(_tuned['best'])
+    print(f"🔧 Loaded tuned configuration from {_tuned.get('tuned_at', 'unknown time')}: {_tuned['best']}")
+
+def _int_param(data, name, default, low, high):
+    """Integer request field within [low, high]; raises ValueError (-> 400) otherwise"""
+    value = data.get(name, default)
+    try:
+        if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+            raise TypeError
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an integer") from None
+    if not low <= value <= high:
+        raise ValueError(f"{name} must be between {low} and {high}")
+    return value
+
+def _request_analyzer(overrides):
+    """Analyzer view for one request, or an error response for invalid overrides"""
+    if overrides is not None and not isinstance(overrides, dict):
+        return None, (jsonify({"error": "overrides must be an object"}), 400)
+    try:
+        return analyzer.with_overrides(**(overrides or {})), None
+    except (TypeError, ValueError) as e:
+        return None, (jsonify({"error": f"Invalid overrides: {e}"}), 400)
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    return jsonify({
-        "status": "healthy", 
-        "message": "MarketMatch API is running",
+    """Liveness: constant-time, touches neither the filesystem nor the caches"""
+    return cached_response(
+        f"live-{BOOT_ID}",
+        lambda: jsonify({"status": "healthy", "message": "MarketMatch API is running"}),
+        max_age=0
+    )
+
+@app.route('/api/health/ready', methods=['GET'])
+def readiness_check():
+    """Readiness: build, cache and symbol directory details"""
+    details = {
+        "status": "ready",
         "build_folder": BUILD_FOLDER,
-        "build_exists": os.path.exists(BUILD_FOLDER),
-        "build_files": os.listdir(BUILD_FOLDER) if os.path.exists(BUILD_FOLDER) else [],
-        "cache_active": analyzer._market_data_cache is not None
-    })
+        "build_exists": BUILD_EXISTS,
+        "build_files": BUILD_MANIFEST.top_level(),
+        "cache_active": len(analyzer._market_data_cache) > 0,
+        "cached_frequencies": sorted({key[0] for key in analyzer._market_data_cache.keys()}),
+        "symbol_directory_size": len(symbol_directory),
+        "symbol_directory_markets": sorted(market or 'US' for market in symbol_directory.markets)
+    }
+    etag = hashlib.sha1(repr(sorted(details.items())).encode()).hexdigest()[:16]
+    return cached_response(etag, lambda: jsonify(details), max_age=0)
 
 @app.route('/api/clear-cache', methods=['POST'])
 def clear_cache():
     """Clear cached market data"""
-    analyzer._market_data_cache = None
-    analyzer._market_returns_cache = None
+    analyzer.clear_cache()
     return jsonify({"message": "Cache cleared successfully"})
 
 @app.route('/api/test-cors', methods=['POST', 'OPTIONS'])
@@ -665,7 +924,10 @@ def filter_stocks():
         if not tickers:
             return jsonify({"error": "No tickers provided"}), 400
         
-        filtered_tickers, removed_stocks = analyzer.remove_unwanted(tickers)
+        # Local normalize/dedupe/validate pass before any network screening
+        screen = SymbolScreen(symbol_directory).extend(tickers)
+        filtered_tickers, removed_stocks = analyzer.remove_unwanted(screen.accepted)
+        removed_stocks = screen.removed_messages() + removed_stocks
         
         return jsonify({
             "filtered_tickers": filtered_tickers,
@@ -682,11 +944,17 @@ def rate_stocks():
     try:
         data = request.get_json()
         tickers = data.get('tickers', [])
+        req_analyzer, error = _request_analyzer(data.get('overrides'))
+        if error:
+            return error
+        frequency = data.get('frequency', req_analyzer.frequency)
         
         if not tickers:
             return jsonify({"error": "No tickers provided"}), 400
+        if frequency not in FREQUENCIES:
+            return jsonify({"error": f"Unsupported frequency '{frequency}'"}), 400
         
-        ratings_df = analyzer.rate_stocks(tickers)
+        ratings_df = req_analyzer.rate_stocks(tickers, frequency)
         
         if ratings_df.empty:
             return jsonify({"error": "No valid stocks found for rating"}), 400
@@ -709,23 +977,34 @@ def optimize_portfolio():
         budget = data.get('budget', 1000000)
         skip_backtest = data.get('skip_backtest', False)  # New parameter
         skip_filtering = data.get('skip_filtering', False)  # New parameter
+        req_analyzer, error = _request_analyzer(data.get('overrides'))  # dates, weights, alphas
+        if error:
+            return error
+        frequency = data.get('frequency', req_analyzer.frequency)  # '1d', '1wk' or '1mo'
+        selection = data.get('selection', 'rating')  # 'rating' or 'tracking_error'
         
         if not tickers:
             return jsonify({"error": "No tickers provided"}), 400
+        if frequency not in FREQUENCIES:
+            return jsonify({"error": f"Unsupported frequency '{frequency}'"}), 400
+        if selection not in ('rating', 'tracking_error'):
+            return jsonify({"error": f"Unsupported selection '{selection}'"}), 400
         
         print(f"\n{'='*60}")
         print(f"PORTFOLIO OPTIMIZATION STARTED")
         print(f"Input: {len(tickers)} tickers, requesting {num_stocks} stocks")
-        print(f"Skip filtering: {skip_filtering}, Skip backtest: {skip_backtest}")
+        print(f"Skip filtering: {skip_filtering}, Skip backtest: {skip_backtest}, Frequency: {frequency}")
         print(f"{'='*60}\n")
         
-        # Step 1: Filter stocks (optional)
+        # Step 1: Filter stocks (symbol validation always runs; it is local and cheap)
+        screen = SymbolScreen(symbol_directory).extend(tickers)
         if skip_filtering:
-            print(f"\n⏭️  Skipping filtering (using all {len(tickers)} tickers)")
-            filtered_tickers = tickers
-            removed_stocks = []
+            print(f"\n⏭️  Skipping filtering (using all {len(screen.accepted)} valid tickers)")
+            filtered_tickers = screen.accepted
+            removed_stocks = screen.removed_messages()
         else:
-            filtered_tickers, removed_stocks = analyzer.remove_unwanted(tickers)
+            filtered_tickers, removed_stocks = req_analyzer.remove_unwanted(screen.accepted)
+            removed_stocks = screen.removed_messages() + removed_stocks
             print(f"\n📋 Filtering Results:")
             print(f"   Accepted: {len(filtered_tickers)}")
             print(f"   Removed: {len(removed_stocks)}")
@@ -734,21 +1013,26 @@ def optimize_portfolio():
             return jsonify({"error": "No valid stocks after filtering"}), 400
         
         # Step 2: Rate stocks
-        ratings_df = analyzer.rate_stocks(filtered_tickers)
+        ratings_df = req_analyzer.rate_stocks(filtered_tickers, frequency)
         print(f"\n📊 Rating Results:")
         print(f"   Successfully rated: {len(ratings_df)} stocks")
         
         if ratings_df.empty:
             return jsonify({"error": "No stocks could be rated"}), 400
         
-        # Step 3: Select top stocks by composite rating
+        # Steps 3-4: Select stocks and optimize weights
         stocks_to_select = min(num_stocks, len(ratings_df))
-        selected_stocks = ratings_df.head(stocks_to_select)
-        print(f"\n✅ Selected top {len(selected_stocks)} stocks by rating")
-
-        # Step 4: Ridge Regression weight optimization
-        print(f"\n📐 Running Ridge Regression weight optimization...")
-        weighted_portfolio = analyzer.calculate_weights(selected_stocks)
+        weighted_portfolio = None
+        if selection == 'tracking_error':
+            print(f"\n🎯 Selecting {stocks_to_select} stocks by tracking error...")
+            weighted_portfolio = req_analyzer.select_portfolio(ratings_df, stocks_to_select, frequency)
+        
+        if weighted_portfolio is None:
+            # Select top stocks by composite rating, then Ridge Regression weights
+            selected_stocks = ratings_df.head(stocks_to_select)
+            print(f"\n✅ Selected top {len(selected_stocks)} stocks by rating")
+            print(f"\n📐 Running Ridge Regression weight optimization...")
+            weighted_portfolio = req_analyzer.calculate_weights(selected_stocks, frequency)
         print(f"   Weight method: {weighted_portfolio['weight_method'].iloc[0] if not weighted_portfolio.empty else 'unknown'}")
         
         # Step 5: Backtest (optional)
@@ -757,13 +1041,13 @@ def optimize_portfolio():
             backtest = {"skipped": True, "message": "Backtest skipped for faster results"}
         else:
             print(f"\n📈 Running backtest (this may take a moment)...")
-            backtest = analyzer.backtest_portfolio(weighted_portfolio, analyzer.backtest_start, analyzer.backtest_end)
+            backtest = req_analyzer.backtest_portfolio(weighted_portfolio, req_analyzer.backtest_start, req_analyzer.backtest_end, frequency)
         
         # Step 6: Calculate performance snapshot
-        portfolio_result, total_fees = analyzer.calculate_portfolio_performance(weighted_portfolio, budget)
+        portfolio_result, total_fees = req_analyzer.calculate_portfolio_performance(weighted_portfolio, budget)
         
         # Step 7: Get market data for comparison
-        market_data, sp500, tsx = analyzer.get_market_data()
+        market_data, sp500, tsx = req_analyzer.get_market_data(frequency)
         
         # Calculate portfolio vs market performance (snapshot)
         total_value = portfolio_result['Value'].sum() if not portfolio_result.empty else 0
@@ -774,8 +1058,8 @@ def optimize_portfolio():
         print(f"Final portfolio: {len(portfolio_result)} stocks")
         print(f"{'='*60}\n")
         
-        return jsonify({
-            "portfolio": portfolio_result.to_dict('records'),
+        return encode({
+            "portfolio": portfolio_result.to_dict('list' if wants_columnar() else 'records'),
             "summary": {
                 "total_value": round(total_value, 2),
                 "total_fees": round(total_fees, 2),
@@ -785,7 +1069,9 @@ def optimize_portfolio():
                 "num_stocks": len(portfolio_result),
                 "requested_stocks": num_stocks,
                 "stocks_after_filtering": len(filtered_tickers),
-                "stocks_after_rating": len(ratings_df)
+                "stocks_after_rating": len(ratings_df),
+                "frequency": frequency,
+                "selection": selection
             },
             "filtering_results": {
                 "removed_stocks": removed_stocks,
@@ -802,36 +1088,161 @@ def optimize_portfolio():
         print(traceback.format_exc())
         return jsonify({"error": str(e), "traceback": traceback.format_exc()}), 500
 
-@app.route('/api/market-data', methods=['GET'])
-def get_market_data():
+@app.route('/api/tune', methods=['POST'])
+def tune_parameters():
+    """Cross-validated search over Ridge alpha and rating weights (results only; apply via tuning.py)"""
     try:
-        market_data, sp500, tsx = analyzer.get_market_data()
+        data = request.get_json()
+        tickers = data.get('tickers', [])
+        req_analyzer, error = _request_analyzer(data.get('overrides'))
+        if error:
+            return error
+        frequency = data.get('frequency', req_analyzer.frequency)
+        search_mode = data.get('search', 'random')  # 'random' or 'grid'
+        
+        if not tickers:
+            return jsonify({"error": "No tickers provided"}), 400
+        if frequency not in FREQUENCIES:
+            return jsonify({"error": f"Unsupported frequency '{frequency}'"}), 400
+        if search_mode not in ('random', 'grid'):
+            return jsonify({"error": f"Unsupported search '{search_mode}'"}), 400
+        # Changing the production scoring weights is an operator action, not an API call
+        if data.get('apply') or data.get('persist'):
+            return jsonify({"error": "apply/persist are only available from the command line (python tuning.py)"}), 400
+        
+        num_stocks = _int_param(data, 'num_stocks', 24, 1, 200)
+        n_iter = _int_param(data, 'n_iter', 200, 1, TUNE_MAX_ITER)
+        n_splits = _int_param(data, 'n_splits', 5, 2, 10)
+        workers = _int_param(data, 'workers', 1, 1, TUNE_MAX_WORKERS)
+        seed = _int_param(data, 'seed', 0, 0, 2**32 - 1)
+        alphas = data.get('alphas')
+        if alphas is not None:
+            if (not isinstance(alphas, list) or not 1 <= len(alphas) <= TUNE_MAX_ALPHAS
+                    or not all(isinstance(a, (int, float)) and not isinstance(a, bool) and a > 0 for a in alphas)):
+                return jsonify({"error": f"alphas must be a list of 1-{TUNE_MAX_ALPHAS} positive numbers"}), 400
         
-        # Calculate percentage changes
-        sp500_start = sp500.iloc[0]['Close']
-        sp500_end = sp500.iloc[-1]['Close']
-        sp500_pct_change = ((sp500_end - sp500_start) / sp500_start) * 100
+        screen = SymbolScreen(symbol_directory).extend(tickers)
+        result = tuning.tune(
+            req_analyzer,
+            screen.accepted,
+            num_stocks=num_stocks,
+            frequency=frequency,
+            search_mode=search_mode,
+            n_iter=n_iter,
+            alphas=alphas,
+            n_splits=n_splits,
+            max_workers=workers,
+            seed=seed
+        )
+        return jsonify(result)
         
-        tsx_start = tsx.iloc[0]['Close']
-        tsx_end = tsx.iloc[-1]['Close']
-        tsx_pct_change = ((tsx_end - tsx_start) / tsx_start) * 100
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e), "traceback": traceback.format_exc()}), 500
+
+@app.route('/api/weight-stability', methods=['POST'])
+def weight_stability():
+    """Bootstrap confidence bands for portfolio weights"""
+    try:
+        data = request.get_json()
+        tickers = data.get('tickers', [])
+        req_analyzer, error = _request_analyzer(data.get('overrides'))
+        if error:
+            return error
+        frequency = data.get('frequency', req_analyzer.frequency)
         
-        avg_pct_change = (sp500_pct_change + tsx_pct_change) / 2
+        if not tickers:
+            return jsonify({"error": "No tickers provided"}), 400
+        if len(tickers) > stability.MAX_TICKERS:
+            return jsonify({"error": f"At most {stability.MAX_TICKERS} tickers are supported"}), 400
+        if frequency not in FREQUENCIES:
+            return jsonify({"error": f"Unsupported frequency '{frequency}'"}), 400
         
-        return jsonify({
-            "sp500_data": sp500.to_dict('index'),
-            "tsx_data": tsx.to_dict('index'),
-            "combined_returns": market_data['Total_Returns'].to_dict(),
-            "performance": {
-                "sp500_return": round(sp500_pct_change, 4),
-                "tsx_return": round(tsx_pct_change, 4),
-                "avg_return": round(avg_pct_change, 4)
-            }
+        n_resamples = _int_param(data, 'n_resamples', 2000, 1, 20000)
+        seed = _int_param(data, 'seed', 0, 0, 2**32 - 1)
+        block_length = None
+        if data.get('block_length') is not None:
+            block_length = _int_param(data, 'block_length', None, 1, 10000)
+        confidence = data.get('confidence', 0.9)
+        if isinstance(confidence, bool) or not isinstance(confidence, (int, float)) or not 0 < confidence < 1:
+            return jsonify({"error": "confidence must be a number between 0 and 1"}), 400
+        
+        screen = SymbolScreen(symbol_directory).extend(tickers)
+        result = req_analyzer.weight_stability(
+            screen.accepted,
+            frequency=frequency,
+            n_resamples=n_resamples,
+            block_length=block_length,
+            confidence=float(confidence),
+            seed=seed
+        )
+        return encode(result)
+        
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e), "traceback": traceback.format_exc()}), 500
+
+@app.route('/api/market-data', methods=['GET'])
+def get_market_data():
+    try:
+        req_analyzer, error = _request_analyzer({
+            'start_date': request.args.get('start_date'),
+            'end_date': request.args.get('end_date')
         })
+        if error:
+            return error
+        frequency = request.args.get('frequency', req_analyzer.frequency)
+        if frequency not in FREQUENCIES:
+            return jsonify({"error": f"Unsupported frequency '{frequency}'"}), 400
+        
+        # Cheap when cached: the ETag only needs the snapshot's content hash
+        etag = f"md-{req_analyzer.market_data_version(frequency)}-{frequency}-{representation()}"
+        return cached_response(etag, lambda: _market_data_response(req_analyzer, frequency))
         
     except Exception as e:
         return jsonify({"error": str(e), "traceback": traceback.format_exc()}), 500
 
+def _market_data_response(req_analyzer, frequency):
+    market_data, sp500, tsx = req_analyzer.get_market_data(frequency)
+    
+    # Calculate percentage changes
+    sp500_start = sp500.iloc[0]['Close']
+    sp500_end = sp500.iloc[-1]['Close']
+    sp500_pct_change = ((sp500_end - sp500_start) / sp500_start) * 100
+    
+    tsx_start = tsx.iloc[0]['Close']
+    tsx_end = tsx.iloc[-1]['Close']
+    tsx_pct_change = ((tsx_end - tsx_start) / tsx_start) * 100
+    
+    avg_pct_change = (sp500_pct_change + tsx_pct_change) / 2
+    performance = {
+        "sp500_return": round(sp500_pct_change, 4),
+        "tsx_return": round(tsx_pct_change, 4),
+        "avg_return": round(avg_pct_change, 4)
+    }
+    
+    if wants_columnar():
+        # Arrays keyed by column, aligned on the combined-returns dates
+        sp500_close = sp500['Close'].reindex(market_data.index)
+        tsx_close = tsx['Close'].reindex(market_data.index)
+        return encode({
+            "dates": date_list(market_data.index),
+            "sp500_close": to_list(sp500_close.values),
+            "tsx_close": to_list(tsx_close.values),
+            "combined_returns": to_list(market_data['Total_Returns'].values),
+            "performance": performance
+        })
+    
+    return jsonify({
+        "sp500_data": sp500.to_dict('index'),
+        "tsx_data": tsx.to_dict('index'),
+        "combined_returns": market_data['Total_Returns'].to_dict(),
+        "performance": performance
+    })
+
+
 @app.route('/api/upload-csv', methods=['POST'])
 def upload_csv():
     try:
@@ -842,16 +1253,21 @@ def upload_csv():
         if file.filename == '':
             return jsonify({"error": "No file selected"}), 400
         
-        # Read CSV file
-        df = pd.read_csv(file)
-        
-        # Extract tickers (assume first column contains tickers)
-        tickers = df.iloc[:, 0].dropna().tolist()
+        # Stream the CSV in chunks: normalize, dedupe and validate each symbol
+        try:
+            screen = screen_csv(file.stream, symbol_directory)
+        except EmptyDataError:
+            return jsonify({"error": "CSV file is empty"}), 400
+        tickers = screen.accepted
         
         return jsonify({
             "tickers": tickers,
             "total_count": len(tickers),
-            "message": f"Successfully loaded {len(tickers)} tickers from CSV"
+            "rejected": screen.rejected,
+            "total_rejected": screen.total_rejected,
+            "duplicates_removed": screen.duplicates,
+            "rows_read": screen.rows,
+            "message": f"Successfully loaded {len(tickers)} tickers from CSV ({screen.total_rejected} rejected, {screen.duplicates} duplicates removed)"
         })
         
     except Exception as e:
@@ -862,8 +1278,8 @@ def upload_csv():
 @app.route('/<path:path>')
 def serve(path):
     try:
-        # If build folder doesn't exist, return API info for root only
-        if not os.path.exists(BUILD_FOLDER):
+        # If there is no build, return API info for root only
+        if not BUILD_MANIFEST:
             if path == '':
                 return jsonify({
                     "service": "MarketMatch API",
@@ -872,6 +1288,7 @@ def serve(path):
                         "/api/health",
                         "/api/market-data",
                         "/api/optimize-portfolio",
+                        "/api/weight-stability",
                         "/api/upload-csv"
                     ]
                 })
@@ -879,19 +1296,14 @@ def serve(path):
                 # For non-root paths, return 404 if build doesn't exist
                 return jsonify({"error": "Frontend build not available"}), 404
         
-        # If path exists in build folder, serve it
-        if path != "" and os.path.exists(os.path.join(BUILD_FOLDER, path)):
-            return send_from_directory(BUILD_FOLDER, path)
-        
-        # Otherwise serve index.html for React Router
-        index_path = os.path.join(BUILD_FOLDER, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(BUILD_FOLDER, 'index.html')
-        else:
+        # Build files by manifest lookup; other paths get index.html for React Router
+        asset = BUILD_MANIFEST.lookup(path or 'index.html')
+        if asset is None:
             return jsonify({
-                "error": "index.html not found",
+                "error": f"{path} not found" if path.startswith('static/') else "index.html not found",
                 "build_folder": BUILD_FOLDER
             }), 404
+        return BUILD_MANIFEST.response(asset)
     except Exception as e:
         return jsonify({
             "error": str(e),
@@ -0,0 +1,299 @@
+"""
+Headless batch runs of the screening -> rating -> weighting -> backtest pipeline.
+
+    python batch.py ../Tickers.csv runs/nightly --num-stocks 24 --frequency 1mo
+
+Every stage calls the same MarketMatchAnalyzer methods as the API and writes
+its result as Parquet into the output directory; run.json records finished
+stages. Re-running with the same arguments resumes after the last finished
+stage, and the chunked filter and rate stages resume at the first chunk
+without a part file. Daily closes are evicted after each rated chunk, so
+memory grows with --chunk-size rather than with the size of the universe.
+
+Parquet output requires pyarrow (pip install pyarrow).
+"""
+import argparse
+import glob
+import hashlib
+import importlib.util
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+
+STAGES = ['screen', 'filter', 'rate', 'weights', 'backtest']
+STATE_FILE = 'run.json'
+DEFAULT_CHUNK_SIZE = 500
+# Tracking-error selection considers only the top-rated names, bounding the training matrix
+DEFAULT_CANDIDATES = 500
+
+
+class BatchRun:
+    """Output directory of one batch run and its checkpoint state"""
+
+    def __init__(self, output_dir, fingerprint, restart=False):
+        self.output_dir = output_dir
+        self.state_path = os.path.join(output_dir, STATE_FILE)
+        if restart:
+            self._clean()
+        os.makedirs(output_dir, exist_ok=True)
+
+        self.state = {'fingerprint': fingerprint, 'stages': {}}
+        if os.path.exists(self.state_path):
+            with open(self.state_path) as f:
+                state = json.load(f)
+            if state.get('fingerprint') != fingerprint:
+                raise ValueError(f"{output_dir} holds a run with different inputs; use --restart or another directory")
+            self.state = state
+
+    def _clean(self):
+        """
+        Remove a previous run's outputs: run.json, the stage folders and
+        top-level Parquet files. Directories without a run.json from this
+        tool, and any other files in them, are left alone.
+        """
+        if not os.path.isdir(self.output_dir):
+            return
+        if not os.path.isfile(self.state_path):
+            raise ValueError(f"{self.output_dir} has no {STATE_FILE}; refusing to --restart a directory "
+                             f"this tool did not create")
+        with open(self.state_path) as f:
+            try:
+                state = json.load(f)
+            except ValueError:
+                state = None
+        if not isinstance(state, dict) or 'fingerprint' not in state or 'stages' not in state:
+            raise ValueError(f"{self.state_path} is not a batch run state file; refusing to --restart")
+
+        for stage in STAGES:
+            stage_dir = self.path(stage)
+            if os.path.isdir(stage_dir):
+                for name in os.listdir(stage_dir):
+                    if name.endswith(('.parquet', '.parquet.tmp')):
+                        os.remove(os.path.join(stage_dir, name))
+                if not os.listdir(stage_dir):
+                    os.rmdir(stage_dir)
+        for name in os.listdir(self.output_dir):
+            if name.endswith(('.parquet', '.parquet.tmp')):
+                os.remove(self.path(name))
+        if os.path.exists(f"{self.state_path}.tmp"):
+            os.remove(f"{self.state_path}.tmp")
+        os.remove(self.state_path)
+
+    def path(self, name):
+        return os.path.join(self.output_dir, name)
+
+    def done(self, stage):
+        return stage in self.state['stages']
+
+    def finish(self, stage, **info):
+        """Mark a stage finished; only called after its outputs are written"""
+        info['finished_at'] = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        self.state['stages'][stage] = info
+        self._save()
+        print(f"💾 Stage '{stage}' complete")
+
+    def _save(self):
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def write(self, df, name):
+        """Write a Parquet file atomically, so a partial file never looks finished"""
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+    def read(self, name, columns=None):
+        return pd.read_parquet(self.path(name), columns=columns)
+
+    def read_parts(self, stage, columns=None):
+        parts = sorted(glob.glob(os.path.join(self.output_dir, stage, 'part-*.parquet')))
+        frames = [pd.read_parquet(p, columns=columns) for p in parts]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+
+    def run_chunks(self, stage, items, chunk_size, process):
+        """Run process(chunk) -> DataFrame per chunk, skipping chunks already written"""
+        n_chunks = -(-len(items) // chunk_size)
+        for i in range(n_chunks):
+            name = os.path.join(stage, f"part-{i:05d}.parquet")
+            if os.path.exists(self.path(name)):
+                continue
+            chunk = items[i * chunk_size:(i + 1) * chunk_size]
+            print(f"\n📦 {stage}: chunk {i + 1}/{n_chunks} ({len(chunk)} tickers)")
+            self.write(process(chunk), name)
+        return n_chunks
+
+
+def fingerprint(tickers_csv, args):
+    """Hash of the ticker file and every argument that changes results"""
+    digest = hashlib.sha256()
+    with open(tickers_csv, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    params = {
+        'frequency': args.frequency,
+        'num_stocks': args.num_stocks,
+        'selection': args.selection,
+        'candidates': args.candidates,
+        'chunk_size': args.chunk_size,
+        'skip_filtering': args.skip_filtering,
+        'header': args.header,
+        'overrides': args.overrides,
+    }
+    digest.update(json.dumps(params, sort_keys=True).encode())
+    return digest.hexdigest()[:16]
+
+
+def screen_stage(run, tickers_csv, symbol_directory, header):
+    from symbols import SymbolScreen, iter_csv_symbols
+
+    with open(tickers_csv, 'rb') as f:
+        screen = SymbolScreen(symbol_directory).extend(iter_csv_symbols(f, header=header))
+    rejected = pd.DataFrame(screen.rejected, columns=['symbol', 'reason'])
+    run.write(pd.DataFrame({'Ticker': screen.accepted}), 'screen/accepted.parquet')
+    run.write(rejected.rename(columns={'symbol': 'Ticker', 'reason': 'Reason'}), 'screen/rejected.parquet')
+    run.finish('screen', rows=screen.rows, accepted=len(screen.accepted),
+               rejected=screen.total_rejected, duplicates=screen.duplicates)
+
+
+def filter_stage(run, analyzer, chunk_size, skip_filtering):
+    tickers = run.read('screen/accepted.parquet')['Ticker'].tolist()
+
+    def process(chunk):
+        if skip_filtering:
+            return pd.DataFrame({'Ticker': chunk, 'Passed': True, 'Reason': ''})
+        passed, removed = analyzer.remove_unwanted(chunk)
+        removed = [message.split(' - ', 1) for message in removed]
+        return pd.DataFrame({
+            'Ticker': passed + [r[0] for r in removed],
+            'Passed': [True] * len(passed) + [False] * len(removed),
+            'Reason': [''] * len(passed) + [r[1] if len(r) > 1 else '' for r in removed],
+        })
+
+    n_chunks = run.run_chunks('filter', tickers, chunk_size, process)
+    passed = run.read_parts('filter', columns=['Ticker', 'Passed'])['Passed']
+    run.finish('filter', chunks=n_chunks, passed=int(passed.sum()), removed=int((~passed.astype(bool)).sum()))
+
+
+def rate_stage(run, analyzer, chunk_size, frequency):
+    filtered = run.read_parts('filter', columns=['Ticker', 'Passed'])
+    tickers = filtered.loc[filtered['Passed'].astype(bool), 'Ticker'].tolist()
+
+    def process(chunk):
+        ratings = analyzer.rate_stocks(chunk, frequency)
+        analyzer.evict_closes(chunk)
+        return ratings
+
+    n_chunks = run.run_chunks('rate', tickers, chunk_size, process)
+    ratings = run.read_parts('rate')
+    if not ratings.empty:
+        ratings = ratings.sort_values(by='Rating', ascending=False).reset_index(drop=True)
+    run.write(ratings, 'ratings.parquet')
+    run.finish('rate', chunks=n_chunks, rated=len(ratings))
+
+
+def weights_stage(run, analyzer, num_stocks, frequency, selection, candidates):
+    ratings = run.read('ratings.parquet')
+    if ratings.empty:
+        raise RuntimeError("No stocks could be rated")
+
+    stocks_to_select = min(num_stocks, len(ratings))
+    portfolio = None
+    if selection == 'tracking_error':
+        portfolio = analyzer.select_portfolio(ratings.head(candidates), stocks_to_select, frequency)
+    if portfolio is None:
+        portfolio = analyzer.calculate_weights(ratings.head(stocks_to_select), frequency)
+    run.write(portfolio, 'weights.parquet')
+    run.finish('weights', num_stocks=len(portfolio), method=str(portfolio['weight_method'].iloc[0]))
+
+
+def backtest_stage(run, analyzer, frequency):
+    portfolio = run.read('weights.parquet')
+    backtest = analyzer.backtest_portfolio(portfolio, analyzer.backtest_start, analyzer.backtest_end, frequency)
+    if 'error' in backtest:
+        raise RuntimeError(f"Backtest failed: {backtest['error']}")
+    run.write(pd.DataFrame({
+        'Date': pd.to_datetime(backtest['dates']),
+        'Portfolio': backtest['portfolio_index'],
+        'Blended': backtest['blended_index'],
+    }), 'backtest.parquet')
+    run.finish('backtest', **{k: backtest[k] for k in ('portfolio_return_pct', 'blended_return_pct', 'correlation')})
+
+
+def parse_overrides(values):
+    overrides = {}
+    for value in values or []:
+        key, sep, setting = value.partition('=')
+        if not sep:
+            raise ValueError(f"Override '{value}' is not KEY=VALUE")
+        overrides[key.strip()] = setting.strip()
+    return overrides
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the MarketMatch pipeline headlessly with checkpoints")
+    parser.add_argument('tickers_csv', help="CSV with tickers in the first column")
+    parser.add_argument('output_dir', help="Directory for Parquet outputs and checkpoint state")
+    parser.add_argument('--num-stocks', type=int, default=24)
+    parser.add_argument('--frequency', default=None, choices=['1d', '1wk', '1mo'])
+    parser.add_argument('--selection', default='rating', choices=['rating', 'tracking_error'])
+    parser.add_argument('--candidates', type=int, default=DEFAULT_CANDIDATES,
+                        help="Top-rated names considered by tracking_error selection")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Tickers filtered and rated per checkpointed chunk")
+    parser.add_argument('--header', action='store_true', help="First row of the CSV is a header, not a ticker")
+    parser.add_argument('--skip-filtering', action='store_true', help="Skip the network liquidity checks")
+    parser.add_argument('--override', dest='overrides', action='append', metavar='KEY=VALUE',
+                        help="Analyzer parameter for this run, e.g. start_date=2021-01-01 (repeatable)")
+    parser.add_argument('--restart', action='store_true', help="Discard any previous run in output_dir")
+    args = parser.parse_args(argv)
+
+    if not any(importlib.util.find_spec(engine) for engine in ('pyarrow', 'fastparquet')):
+        parser.error("Parquet output requires pyarrow (pip install pyarrow)")
+    try:
+        args.overrides = parse_overrides(args.overrides)
+        run = BatchRun(args.output_dir, fingerprint(args.tickers_csv, args), restart=args.restart)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    from app import analyzer, symbol_directory
+
+    try:
+        analyzer = analyzer.with_overrides(frequency=args.frequency, **args.overrides)
+    except (TypeError, ValueError) as e:
+        parser.error(f"Invalid overrides: {e}")
+    frequency = analyzer.frequency
+
+    started = time.time()
+    steps = {
+        'screen': lambda: screen_stage(run, args.tickers_csv, symbol_directory, args.header),
+        'filter': lambda: filter_stage(run, analyzer, args.chunk_size, args.skip_filtering),
+        'rate': lambda: rate_stage(run, analyzer, args.chunk_size, frequency),
+        'weights': lambda: weights_stage(run, analyzer, args.num_stocks, frequency, args.selection, args.candidates),
+        'backtest': lambda: backtest_stage(run, analyzer, frequency),
+    }
+    for stage in STAGES:
+        if run.done(stage):
+            print(f"⏭️  Stage '{stage}' already complete")
+            continue
+        print(f"\n{'='*60}\nSTAGE: {stage}\n{'='*60}")
+        try:
+            steps[stage]()
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            return 1
+
+    print(f"\n✅ Batch run complete in {time.time() - started:.1f}s: {args.output_dir}")
+    print(json.dumps(run.state['stages'], indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
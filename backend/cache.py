@@ -0,0 +1,131 @@
+"""Thread-safe caches for the analyzer."""
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class SingleFlightCache:
+    """
+    Dict-like cache safe to share between request threads.
+
+    Misses are filled "single-flight": when several threads ask for the same
+    missing key at once, only the first calls the fill function and the rest
+    wait for its result. get_many fills all of a caller's missing keys in
+    one call, so overlapping batches (e.g. two ticker lists sharing symbols)
+    download each key once.
+
+    With max_size set, least recently used entries are evicted once the
+    total size of the cached values exceeds it; sizeof(value) gives each
+    value's size (1 per entry by default, i.e. a key-count limit).
+    """
+
+    def __init__(self, max_size=None, sizeof=None):
+        self._data = OrderedDict()
+        self._sizes = {}
+        self._size = 0
+        self.max_size = max_size
+        self._sizeof = sizeof or (lambda value: 1)
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, keys, fill):
+        """
+        Values for keys, calling fill(missing_keys) -> {key: value} only for
+        keys that are neither cached nor already being filled by another thread.
+
+        Keys fill leaves out of its result come back as None and are not
+        cached, so failed lookups are retried by the next caller.
+        """
+        result = {}
+        owned = []
+        waiting = {}
+        with self._lock:
+            for key in keys:
+                if key in result or key in waiting:
+                    continue
+                # Hits are copied now; a clear() before we return must not drop them
+                if key in self._data:
+                    self._data.move_to_end(key)
+                    result[key] = self._data[key]
+                    continue
+                future = self._inflight.get(key)
+                if future is None:
+                    future = Future()
+                    self._inflight[key] = future
+                    owned.append(key)
+                waiting[key] = future
+
+        if owned:
+            try:
+                values = fill(owned)
+            except BaseException as e:
+                with self._lock:
+                    for key in owned:
+                        self._inflight.pop(key).set_exception(e)
+                raise
+            with self._lock:
+                for key in owned:
+                    if key in values:
+                        self._store(key, values[key])
+                    self._inflight.pop(key).set_result(values.get(key))
+                self._evict()
+
+        for key, future in waiting.items():
+            result[key] = future.result()
+        return result
+
+    def _store(self, key, value):
+        self._remove(key)
+        size = self._sizeof(value)
+        self._data[key] = value
+        self._sizes[key] = size
+        self._size += size
+
+    def _remove(self, key):
+        if key in self._data:
+            del self._data[key]
+            self._size -= self._sizes.pop(key)
+
+    def _evict(self):
+        if self.max_size is None:
+            return
+        while self._size > self.max_size and self._data:
+            self._remove(next(iter(self._data)))
+
+    def get(self, key, fill):
+        """Value for key, calling fill() at most once across concurrent misses"""
+        return self.get_many([key], lambda missing: {key: fill()})[key]
+
+    def peek(self, key, default=None):
+        with self._lock:
+            return self._data.get(key, default)
+
+    def keys(self):
+        with self._lock:
+            return list(self._data)
+
+    def discard(self, keys):
+        """Drop cached values for keys (in-flight fills are unaffected)"""
+        with self._lock:
+            for key in keys:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self._size = 0
+
+    @property
+    def size(self):
+        """Total size of the cached values, as counted by sizeof"""
+        with self._lock:
+            return self._size
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
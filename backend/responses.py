@@ -0,0 +1,154 @@
+"""Content negotiation, compact encodings and compression for API responses."""
+import gzip
+import json
+
+import numpy as np
+from flask import Response, jsonify, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Opt-in compact layout: one array per column instead of nested per-row objects
+COLUMNAR_MIMETYPE = 'application/vnd.marketmatch.columnar+json'
+MSGPACK_MIMETYPE = 'application/msgpack'
+
+# Bodies smaller than this are not worth the compression overhead
+MIN_COMPRESS_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+COMPRESSIBLE_MIMETYPES = (
+    'application/json',
+    COLUMNAR_MIMETYPE,
+    MSGPACK_MIMETYPE,
+    'text/html',
+    'text/css',
+    'text/plain',
+    'application/javascript',
+    'text/javascript',
+)
+
+
+def to_list(values):
+    """Plain Python list from a NumPy array / pandas object, converted in C (NaN -> None)"""
+    values = np.asarray(values)
+    if values.dtype.kind == 'f':
+        missing = np.isnan(values)
+        if missing.any():
+            values = np.where(missing, None, values)
+    return values.tolist()
+
+
+def date_list(index):
+    """'%Y-%m-%d' strings for a DatetimeIndex (or an already-formatted index)"""
+    if hasattr(index, 'strftime'):
+        return to_list(index.strftime('%Y-%m-%d'))
+    return to_list(index)
+
+
+def _accepts(mimetype):
+    """True only if the Accept header names mimetype explicitly (wildcards don't count)"""
+    return any(value == mimetype and quality > 0 for value, quality in request.accept_mimetypes)
+
+
+def wants_msgpack():
+    return msgpack is not None and _accepts(MSGPACK_MIMETYPE)
+
+
+def wants_columnar():
+    """Client asked for the columnar layout via Accept or ?format=columnar"""
+    return request.args.get('format') == 'columnar' or _accepts(COLUMNAR_MIMETYPE) or wants_msgpack()
+
+
+def representation():
+    """Name of the negotiated body format, for cache keys and ETags"""
+    if wants_msgpack():
+        return 'msgpack'
+    if wants_columnar():
+        return 'columnar'
+    return 'json'
+
+
+def _without_nan(value):
+    """Copy of a JSON-style payload with NaN/inf floats replaced by None"""
+    if isinstance(value, float):
+        return value if np.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _without_nan(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_without_nan(item) for item in value]
+    return value
+
+
+def encode(payload, status=200):
+    """Serialize payload as MessagePack or compact JSON when negotiated, plain JSON otherwise"""
+    if wants_msgpack():
+        return Response(msgpack.packb(payload), status=status, mimetype=MSGPACK_MIMETYPE)
+    if wants_columnar():
+        try:
+            body = json.dumps(payload, separators=(',', ':'), allow_nan=False)
+        except ValueError:
+            # e.g. a NaN correlation from a flat backtest; strict JSON has no NaN
+            body = json.dumps(_without_nan(payload), separators=(',', ':'), allow_nan=False)
+        return Response(body, status=status, mimetype=COLUMNAR_MIMETYPE)
+    response = jsonify(payload)
+    response.status_code = status
+    return response
+
+
+def cached_response(etag, build, max_age=300):
+    """
+    Conditional GET: 304 when If-None-Match matches etag, else build().
+
+    ETags are weak because compress_response may re-encode the body; the
+    negotiated representation must already be part of etag.
+    """
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = build()
+    response.set_etag(etag, weak=True)
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    response.vary.add('Accept')
+    return response
+
+
+def _choose_encoding(accept_encoding):
+    if brotli is not None and accept_encoding['br'] > 0:
+        return 'br'
+    if accept_encoding['gzip'] > 0:
+        return 'gzip'
+    return None
+
+
+def compress_response(response):
+    """after_request hook: br/gzip-encode eligible bodies per Accept-Encoding"""
+    if (response.direct_passthrough
+            or response.status_code < 200 or response.status_code >= 300
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = _choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    body = response.get_data()
+    if len(body) < MIN_COMPRESS_SIZE:
+        return response
+    if encoding == 'br':
+        body = brotli.compress(body, quality=BROTLI_QUALITY)
+    else:
+        body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    return response
@@ -0,0 +1,234 @@
+"""Joint stock selection and weighting that minimises tracking error to an index."""
+from collections import namedtuple
+
+import numpy as np
+from scipy.linalg import solve_triangular
+
+SelectionResult = namedtuple('SelectionResult', ['indices', 'weights', 'tracking_error', 'swaps'])
+
+
+class IncrementalRidge:
+    """
+    Ridge fit of y on a changing subset S of X's columns.
+
+    The Gram matrix G_S = X_S'X_S + lam*I is held as its Cholesky factor L and
+    updated in place: adding a column borders L with one row, removing one
+    restores triangularity with Givens rotations. Alongside L we keep, for
+    every column c of X, V[:, c] = L^-1 X_S'x_c and z = L^-1 X_S'y, so the
+    objective after adding any single candidate is known for all candidates
+    at once. Each add costs O(T*C) and each removal O(m*C); nothing is ever
+    refactorised from scratch.
+    """
+
+    def __init__(self, X, y, lam, capacity):
+        self.X = X
+        self.lam = lam
+        n_cols = X.shape[1]
+        self.b = X.T @ y
+        self.yy = float(y @ y)
+        self.gram_diag = np.einsum('ij,ij->j', X, X) + lam
+        self.selected = []
+        self.L = np.zeros((capacity, capacity))
+        self.V = np.zeros((capacity, n_cols))
+        self.z = np.zeros(capacity)
+        # Schur complement g_cc - ||V_c||^2 and V_c'z for every column
+        self.d2 = self.gram_diag.copy()
+        self.s = np.zeros(n_cols)
+
+    @property
+    def size(self):
+        return len(self.selected)
+
+    @property
+    def objective(self):
+        """||y - X_S w||^2 + lam*||w||^2 at the ridge optimum"""
+        m = self.size
+        return self.yy - float(self.z[:m] @ self.z[:m])
+
+    def candidate_scores(self):
+        """
+        Signed z-score of adding each column: the objective drops by its square.
+
+        Already selected and numerically collinear columns score NaN.
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scores = (self.b - self.s) / np.sqrt(self.d2)
+        scores[self.d2 <= 1e-10 * self.gram_diag] = np.nan
+        scores[self.selected] = np.nan
+        return scores
+
+    def add(self, j):
+        """Append column j: rank-one bordering of L and one new row of V"""
+        m = self.size
+        d = np.sqrt(self.d2[j])
+        l = self.V[:m, j].copy()
+        z_new = (self.b[j] - self.s[j]) / d
+
+        self.L[m, :m] = l
+        self.L[m, m] = d
+        v_new = (self.X.T @ self.X[:, j] - self.V[:m].T @ l) / d
+        v_new[j] = d
+        self.V[m] = v_new
+        self.z[m] = z_new
+        self.d2 -= v_new ** 2
+        self.s += v_new * z_new
+        self.selected.append(j)
+
+    def remove(self, pos):
+        """Drop the pos-th selected column: Cholesky downdate via Givens rotations"""
+        m = self.size
+        H = np.delete(self.L[:m, :m], pos, axis=0)
+        V = self.V[:m]
+        z = self.z[:m]
+        # Rows pos.. of H carry one superdiagonal entry; rotate column pairs to clear it
+        # and apply the same rotations to the rows of V and z (V' = Q'V, z' = Q'z)
+        for k in range(pos, m - 1):
+            a, b = H[k, k], H[k, k + 1]
+            r = np.hypot(a, b)
+            c, s = a / r, b / r
+            col_k = H[:, k].copy()
+            H[:, k] = c * col_k + s * H[:, k + 1]
+            H[:, k + 1] = -s * col_k + c * H[:, k + 1]
+            row_k = V[k].copy()
+            V[k] = c * row_k + s * V[k + 1]
+            V[k + 1] = -s * row_k + c * V[k + 1]
+            z[k], z[k + 1] = c * z[k] + s * z[k + 1], -s * z[k] + c * z[k + 1]
+
+        # The last rotated row belongs to the dropped column
+        v_drop, z_drop = V[m - 1].copy(), z[m - 1]
+        self.d2 += v_drop ** 2
+        self.s -= v_drop * z_drop
+        self.L[:m - 1, :m - 1] = H[:, :m - 1]
+        self.L[m - 1, :] = 0
+        self.V[m - 1] = 0
+        self.z[m - 1] = 0
+        self.selected.pop(pos)
+
+    def snapshot(self):
+        m = self.size
+        return (list(self.selected), self.L[:m, :m].copy(), self.V[:m].copy(),
+                self.z[:m].copy(), self.d2.copy(), self.s.copy())
+
+    def restore(self, state):
+        selected, L, V, z, d2, s = state
+        m = len(selected)
+        self.selected = selected
+        self.L[:] = 0
+        self.L[:m, :m] = L
+        self.V[:] = 0
+        self.V[:m] = V
+        self.z[:] = 0
+        self.z[:m] = z
+        self.d2 = d2
+        self.s = s
+
+    def weights(self):
+        """Ridge coefficients for the selected columns (L' w = z)"""
+        m = self.size
+        return solve_triangular(self.L[:m, :m].T, self.z[:m], lower=False)
+
+
+def constrain_weights(raw_weights, min_weight, max_weight):
+    """Long-only weights summing to 1 within [min_weight, max_weight]"""
+    n = len(raw_weights)
+    # Clip negatives to zero first (no short selling)
+    raw_weights = np.maximum(raw_weights, 0)
+    
+    # Normalize to sum to 1
+    if raw_weights.sum() > 0:
+        raw_weights = raw_weights / raw_weights.sum()
+    else:
+        # If all coefficients were negative, use equal weights
+        raw_weights = np.full(n, 1.0 / n)
+
+    # Apply min/max constraints iteratively
+    for iteration in range(10):
+        # Enforce minimum
+        below_min = raw_weights < min_weight
+        if below_min.any():
+            deficit = (min_weight - raw_weights[below_min]).sum()
+            raw_weights[below_min] = min_weight
+            # Reduce others proportionally to make room
+            above_min = ~below_min
+            if above_min.any() and raw_weights[above_min].sum() > 0:
+                reduction_factor = (1.0 - below_min.sum() * min_weight) / raw_weights[above_min].sum()
+                raw_weights[above_min] *= reduction_factor
+        
+        # Enforce maximum
+        above_max = raw_weights > max_weight
+        if above_max.any():
+            raw_weights[above_max] = max_weight
+        
+        # Renormalize
+        raw_weights = raw_weights / raw_weights.sum()
+        
+        # Check convergence
+        if not below_min.any() and not above_max.any():
+            break
+
+    return raw_weights
+
+
+def _best_addition(model, exclude=None):
+    """Column with the largest objective drop whose coefficient enters positive"""
+    scores = model.candidate_scores()
+    if exclude is not None:
+        scores[exclude] = np.nan
+    scores[~(scores > 0)] = np.nan
+    if np.isnan(scores).all():
+        return None, 0.0
+    j = int(np.nanargmax(scores))
+    return j, float(scores[j] ** 2)
+
+
+def select_tracking_portfolio(X, y, k, alpha=0.1, max_swap_passes=3, tol=1e-9):
+    """
+    Choose k columns of X and their weights to track y.
+
+    Greedy forward selection adds, at each step, the name that most reduces
+    the ridge tracking objective ||y - X_S w||^2 + lam*||w||^2, restricted to
+    names entering with a positive coefficient (no short selling). A swap
+    search then tries replacing each member with the best outsider until a
+    pass yields no improvement. alpha is rescaled to one uncentred penalty,
+    lam = alpha * mean(||x_c||^2) / T. That only approximates Ridge(alpha)
+    on StandardScaler output, which centres each column and scales it
+    separately, so selection_alpha is set independently of ridge_alpha.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n_obs, n_cols = X.shape
+    k = min(k, n_cols)
+    lam = alpha * float(np.mean(np.einsum('ij,ij->j', X, X))) / n_obs
+    model = IncrementalRidge(X, y, lam, capacity=k)
+
+    # ── Greedy forward selection ─────────────────────────────────────────
+    while model.size < k:
+        j, _ = _best_addition(model)
+        if j is None:
+            break
+        model.add(j)
+
+    # ── Swap-based local search ──────────────────────────────────────────
+    swaps = 0
+    for _ in range(max_swap_passes):
+        improved = False
+        for member in list(model.selected):
+            if member not in model.selected:
+                continue
+            before = model.objective
+            state = model.snapshot()
+            model.remove(model.selected.index(member))
+            j, gain = _best_addition(model, exclude=member)
+            if j is not None and model.objective - gain < before - tol * max(before, 1.0):
+                model.add(j)
+                swaps += 1
+                improved = True
+            else:
+                model.restore(state)
+        if not improved:
+            break
+
+    indices = np.array(model.selected, dtype=int)
+    weights = model.weights() if model.size else np.zeros(0)
+    residual = y - X[:, indices] @ weights
+    return SelectionResult(indices, weights, float(residual.std()), swaps)
@@ -0,0 +1,156 @@
+"""Block-bootstrap stability of Ridge portfolio weights, batched across resamples."""
+import numpy as np
+
+from selection import constrain_weights
+
+# Resamples solved per batch, before the memory bound below
+BATCH_SIZE = 1000
+# Working memory per batch of resamples (counts, Gram matrices, residuals);
+# the outer products are built in row chunks of a quarter of this
+BATCH_MEMORY_BYTES = 64 * 1024 * 1024
+# Work grows with n_resamples * T * n^2, so n and T are capped outright:
+# 60 names and about five years of daily bars
+MAX_TICKERS = 60
+MAX_OBSERVATIONS = 1260
+TE_PERCENTILES = [5, 25, 50, 75, 95]
+
+
+def block_bootstrap_counts(n_obs, n_resamples, block_length, rng):
+    """
+    Circular moving-block bootstrap, returned as row counts.
+
+    Each resample concatenates random blocks of block_length consecutive
+    observations (wrapping around) until n_obs rows are drawn; row t of
+    the result says how often observation t was drawn in each resample.
+    """
+    n_blocks = -(-n_obs // block_length)
+    starts = rng.integers(0, n_obs, size=(n_resamples, n_blocks))
+    rows = (starts[:, :, None] + np.arange(block_length)).reshape(n_resamples, -1)[:, :n_obs] % n_obs
+    flat = rows + (np.arange(n_resamples) * n_obs)[:, None]
+    return np.bincount(flat.ravel(), minlength=n_resamples * n_obs).reshape(n_resamples, n_obs)
+
+
+def constrain_weights_batch(W, min_weight, max_weight):
+    """Row-wise constrain_weights for a (resamples x n) array, without a Python loop over rows"""
+    n_rows, n = W.shape
+    W = np.maximum(W, 0)
+    sums = W.sum(axis=1, keepdims=True)
+    W = np.where(sums > 0, W / np.where(sums > 0, sums, 1), 1.0 / n)
+
+    active = np.ones(n_rows, dtype=bool)
+    for _ in range(10):
+        below_min = (W < min_weight) & active[:, None]
+        has_below = below_min.any(axis=1)
+        W = np.where(below_min, min_weight, W)
+        rest = np.where(below_min, 0, W).sum(axis=1)
+        rescale = has_below & (~below_min).any(axis=1) & (rest > 0)
+        factor = (1.0 - below_min.sum(axis=1) * min_weight) / np.where(rest > 0, rest, 1)
+        W = np.where(rescale[:, None] & ~below_min, W * factor[:, None], W)
+
+        above_max = (W > max_weight) & active[:, None]
+        W = np.where(above_max, max_weight, W)
+        W = np.where(active[:, None], W / W.sum(axis=1, keepdims=True), W)
+
+        active &= has_below | above_max.any(axis=1)
+        if not active.any():
+            break
+    return W
+
+
+def _ridge_coefficients(counts, X, y, alpha):
+    """
+    Ridge(alpha, fit_intercept=False) on StandardScaler output for every resample.
+
+    A resample with row counts c has Gram X'diag(c)X, which for the whole
+    batch is a GEMM of the counts against the per-row outer products. The
+    outer products are built one row chunk at a time, so memory does not
+    grow with the length of the window. Centering and scaling are
+    applied to the Gram matrix directly.
+    """
+    n_obs, n = X.shape
+    counts = counts.astype(np.float64)
+    mean = counts @ X / n_obs
+    var = counts @ (X * X) / n_obs - mean ** 2
+    std = np.sqrt(np.maximum(var, 0))
+    std[std < 1e-12] = 1.0
+
+    gram = np.zeros((len(counts), n * n))
+    row_chunk = max(1, BATCH_MEMORY_BYTES // (4 * 8 * n * n))
+    for start in range(0, n_obs, row_chunk):
+        rows = X[start:start + row_chunk]
+        products = (rows[:, :, None] * rows[:, None, :]).reshape(len(rows), n * n)
+        gram += counts[:, start:start + row_chunk] @ products
+    gram = gram.reshape(-1, n, n)
+    gram -= n_obs * mean[:, :, None] * mean[:, None, :]
+    gram /= std[:, :, None] * std[:, None, :]
+    rhs = (counts @ (X * y[:, None]) - mean * (counts @ y)[:, None]) / std
+
+    gram += alpha * np.eye(n)
+    return np.linalg.solve(gram, rhs[:, :, None])[:, :, 0]
+
+
+def bootstrap_weights(X, y, alpha=0.1, n_resamples=2000, block_length=None,
+                      max_weight=0.15, seed=0):
+    """
+    Constrained Ridge weights for the full sample and for n_resamples
+    block-bootstrap resamples, plus each resample's tracking error on the
+    full training sample. Weights are fractions summing to 1.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n_obs, n = X.shape
+    if n > MAX_TICKERS:
+        raise ValueError(f"At most {MAX_TICKERS} tickers are supported, got {n}")
+    if n_obs > MAX_OBSERVATIONS:
+        raise ValueError(f"At most {MAX_OBSERVATIONS} observations are supported, got {n_obs}; "
+                         f"use a shorter window or a weekly/monthly frequency")
+    block_length = block_length or max(2, int(round(n_obs ** (1 / 3))))
+    if not 1 <= block_length <= n_obs:
+        raise ValueError(f"block_length must be between 1 and {n_obs}")
+    # Per resample: counts and residuals (T each), the Gram matrix plus the
+    # temporaries of centering and solving (about 3 n^2)
+    batch_size = max(1, min(BATCH_SIZE, BATCH_MEMORY_BYTES // (8 * (3 * n * n + 2 * n_obs + n))))
+    min_weight = 1.0 / (2 * n)
+    rng = np.random.default_rng(seed)
+
+    full = _ridge_coefficients(np.ones((1, n_obs)), X, y, alpha)[0]
+    point = constrain_weights(full, min_weight, max_weight)
+
+    weights = np.empty((n_resamples, n))
+    tracking_errors = np.empty(n_resamples)
+    for start in range(0, n_resamples, batch_size):
+        size = min(batch_size, n_resamples - start)
+        counts = block_bootstrap_counts(n_obs, size, block_length, rng)
+        coefs = _ridge_coefficients(counts, X, y, alpha)
+        batch = constrain_weights_batch(coefs, min_weight, max_weight)
+        weights[start:start + size] = batch
+        tracking_errors[start:start + size] = (batch @ X.T - y).std(axis=1)
+
+    return point, weights, tracking_errors, block_length
+
+
+def summarize(tickers, point, weights, tracking_errors, confidence=0.9):
+    """Per-ticker confidence bands (in %) and the tracking-error distribution"""
+    tail = (1 - confidence) / 2 * 100
+    low, median, high = np.percentile(weights * 100, [tail, 50, 100 - tail], axis=0)
+    mean = weights.mean(axis=0) * 100
+    std = weights.std(axis=0) * 100
+    bands = [
+        {
+            "Ticker": ticker,
+            "Weight": round(float(point[i] * 100), 4),
+            "Mean": round(float(mean[i]), 4),
+            "Std": round(float(std[i]), 4),
+            "Lower": round(float(low[i]), 4),
+            "Median": round(float(median[i]), 4),
+            "Upper": round(float(high[i]), 4),
+        }
+        for i, ticker in enumerate(tickers)
+    ]
+    te_percentiles = np.percentile(tracking_errors, TE_PERCENTILES)
+    distribution = {
+        "mean": float(tracking_errors.mean()),
+        "std": float(tracking_errors.std()),
+        "percentiles": {str(p): float(v) for p, v in zip(TE_PERCENTILES, te_percentiles)},
+    }
+    return bands, distribution
@@ -0,0 +1,166 @@
+"""In-memory manifest of the React build, served with precompressed variants."""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+from collections import namedtuple
+
+from flask import Response, request, send_file
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from responses import BROTLI_QUALITY, COMPRESSIBLE_MIMETYPES, GZIP_LEVEL, MIN_COMPRESS_SIZE
+
+# Create React App puts content-hashed names under static/, e.g. static/js/main.3f2a1b9c.js
+HASHED_ASSET_RE = re.compile(r'^static/.+\.[0-9a-f]{8,}(\.chunk)?\.[A-Za-z0-9]+(\.map)?$')
+IMMUTABLE_MAX_AGE = 31536000
+# Larger files stay on disk and are streamed; everything else is served from memory
+MAX_MEMORY_SIZE = 4 * 1024 * 1024
+# Preference order when several encodings are acceptable
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+COMPRESSIBLE = set(COMPRESSIBLE_MIMETYPES) | {'image/svg+xml', 'application/manifest+json', 'text/xml'}
+
+# variants maps 'identity' / 'br' / 'gzip' to the body bytes, or to a file path for large files
+Asset = namedtuple('Asset', ['mimetype', 'etag', 'immutable', 'variants'])
+
+
+def _mimetype(path):
+    if path.endswith('.map'):
+        return 'application/json'
+    return mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+
+def _load_variant(path, size):
+    if size > MAX_MEMORY_SIZE:
+        return path
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+class StaticManifest:
+    """
+    Index of every file in a build directory, read once per process.
+
+    Requests are answered from the in-memory index, so no path needs an
+    os.path.exists probe. .br/.gz files next to an asset (build.sh writes
+    them at maximum compression) are used as its precompressed variants;
+    missing variants of compressible assets are generated here once, at
+    bounded levels, rather than on every response.
+
+    The directory is scanned on first use, so processes that never serve
+    the frontend (e.g. tuning workers re-importing app.py) skip the work.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._assets = None
+        self._lock = threading.Lock()
+
+    @property
+    def assets(self):
+        if self._assets is None:
+            with self._lock:
+                if self._assets is None:
+                    self._assets = self._scan() if os.path.isdir(self.root) else {}
+        return self._assets
+
+    def __bool__(self):
+        return bool(self.assets)
+
+    def __len__(self):
+        return len(self.assets)
+
+    def top_level(self):
+        """Sorted names of the files and folders directly in the build directory"""
+        return sorted({path.split('/', 1)[0] for path in self.assets})
+
+    def _scan(self):
+        files = {}
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                full_path = os.path.join(dirpath, filename)
+                rel_path = os.path.relpath(full_path, self.root).replace(os.sep, '/')
+                files[rel_path] = full_path
+
+        assets = {}
+        precompressed = 0
+        for rel_path, full_path in files.items():
+            if any(rel_path.endswith(suffix) and rel_path[:-len(suffix)] in files for _, suffix in ENCODINGS):
+                continue
+            stat = os.stat(full_path)
+            mimetype = _mimetype(rel_path)
+            identity = _load_variant(full_path, stat.st_size)
+            variants = {'identity': identity}
+            for encoding, suffix in ENCODINGS:
+                if rel_path + suffix in files:
+                    variant_path = files[rel_path + suffix]
+                    variants[encoding] = _load_variant(variant_path, os.path.getsize(variant_path))
+                    precompressed += 1
+
+            if isinstance(identity, bytes):
+                etag = hashlib.sha1(identity).hexdigest()[:20]
+            else:
+                etag = f"{int(stat.st_mtime)}-{stat.st_size}"
+            if mimetype in COMPRESSIBLE and stat.st_size >= MIN_COMPRESS_SIZE and 'gzip' not in variants:
+                # Large files (e.g. source maps) stay on disk but still get an in-memory encoded copy
+                body = identity
+                if not isinstance(body, bytes):
+                    with open(full_path, 'rb') as f:
+                        body = f.read()
+                variants['gzip'] = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+                if 'br' not in variants and brotli is not None:
+                    variants['br'] = brotli.compress(body, quality=BROTLI_QUALITY)
+
+            assets[rel_path] = Asset(
+                mimetype, etag, bool(HASHED_ASSET_RE.match(rel_path)), variants
+            )
+        print(f"🗂️  Indexed {len(assets)} build files ({precompressed} precompressed variants on disk)")
+        return assets
+
+    def lookup(self, path):
+        """
+        Asset for a request path; unknown paths fall back to index.html for
+        client-side routing, except under static/ where a miss is a real 404.
+        """
+        asset = self.assets.get(path)
+        if asset is None and not path.startswith('static/'):
+            asset = self.assets.get('index.html')
+        return asset
+
+    def response(self, asset):
+        """Serve the best acceptable variant with validators and cache headers"""
+        encoding = 'identity'
+        for candidate, _ in ENCODINGS:
+            if candidate in asset.variants and request.accept_encodings[candidate] > 0:
+                encoding = candidate
+                break
+        etag = asset.etag if encoding == 'identity' else f"{asset.etag}-{encoding}"
+
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            body = asset.variants[encoding]
+            if isinstance(body, bytes):
+                response = Response(body, mimetype=asset.mimetype)
+            else:
+                response = send_file(body, mimetype=asset.mimetype, conditional=False, etag=False)
+            if encoding != 'identity':
+                response.headers['Content-Encoding'] = encoding
+
+        response.set_etag(etag)
+        if len(asset.variants) > 1:
+            response.vary.add('Accept-Encoding')
+        if asset.immutable:
+            response.cache_control.no_cache = None  # send_file defaults to no-cache
+            response.cache_control.public = True
+            response.cache_control.max_age = IMMUTABLE_MAX_AGE
+            response.cache_control.immutable = True
+        else:
+            # index.html and friends must be revalidated so new deploys are picked up
+            response.cache_control.no_cache = True
+        return response
@@ -0,0 +1,355 @@
+"""Ticker symbol directory, normalization, validation and streaming CSV ingestion."""
+import json
+import os
+import re
+import sys
+import tempfile
+from collections import namedtuple
+
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+SYMBOL_DIRECTORY_PATH = os.environ.get(
+    'SYMBOL_DIRECTORY_PATH', os.path.join(BACKEND_DIR, 'data', 'symbols.csv')
+)
+
+# Yahoo suffixes for the Canadian exchanges we support (no suffix = US listing)
+EXCHANGE_SUFFIXES = ('TO', 'V', 'NE', 'CN')
+
+# 1-5 letter root, optional share class/unit ("BRK-B", "REI-UN"), optional Canadian suffix
+_SYMBOL_RE = re.compile(r'^[A-Z]{1,5}(?:-[A-Z]{1,2})?(?:\.(?:' + '|'.join(EXCHANGE_SUFFIXES) + r'))?$')
+_FOREIGN_SUFFIX_RE = re.compile(r'^[A-Z0-9-]+\.([A-Z]{1,3})$')
+_DOT_CLASS_RE = re.compile(r'^([A-Z]{1,5})\.([A-Z])$')
+# Canadian class shares and units with a suffix: RCI.B.TO, BAM.A.TO, REI.UN.TO
+_DOT_CLASS_SUFFIX_RE = re.compile(r'^([A-Z]{1,5})\.([A-Z]{1,2})\.(' + '|'.join(EXCHANGE_SUFFIXES) + r')$')
+
+# Currencies the portfolio can hold
+ALLOWED_CURRENCIES = ('USD', 'CAD')
+
+DIRECTORY_COLUMNS = ['symbol', 'exchange', 'currency', 'status']
+
+# NASDAQ Trader exchange codes used in otherlisted.txt
+_OTHERLISTED_EXCHANGES = {
+    'A': 'NYSE American',
+    'N': 'NYSE',
+    'P': 'NYSE Arca',
+    'Z': 'Cboe BZX',
+    'V': 'IEX',
+}
+
+# Listing sources for `python symbols.py download` (run by build.sh)
+NASDAQ_TRADER_URLS = {
+    'nasdaqlisted.txt': 'https://www.nasdaqtrader.com/dynamic/SymDir/nasdaqlisted.txt',
+    'otherlisted.txt': 'https://www.nasdaqtrader.com/dynamic/SymDir/otherlisted.txt',
+}
+TMX_DIRECTORY_URL = 'https://www.tsx.com/json/company-directory/search/{market}/%5E*'
+# TMX company directory market -> (exchange name, Yahoo suffix)
+TMX_MARKETS = {'tsx': ('TSX', 'TO'), 'tsxv': ('TSXV', 'V')}
+
+CSV_CHUNK_ROWS = 5000
+MAX_REPORTED_REJECTS = 100
+
+
+def normalize_symbol(raw):
+    """Canonical Yahoo form of a raw ticker cell ('  brk.b ' -> 'BRK-B', 'RCI.B.TO' -> 'RCI-B.TO')"""
+    if raw is None:
+        return ''
+    symbol = re.sub(r'\s+', '', str(raw)).upper().lstrip('$')
+    # US share classes are written with a dot in most sources, a hyphen on Yahoo
+    match = _DOT_CLASS_RE.match(symbol)
+    if match and match.group(2) not in EXCHANGE_SUFFIXES:
+        return f"{match.group(1)}-{match.group(2)}"
+    match = _DOT_CLASS_SUFFIX_RE.match(symbol)
+    if match:
+        return f"{match.group(1)}-{match.group(2)}.{match.group(3)}"
+    return symbol
+
+
+def _market(symbol):
+    """Yahoo suffix of a Canadian listing ('TO', 'V', ...), '' for US symbols"""
+    _, dot, suffix = symbol.rpartition('.')
+    return suffix if dot and suffix in EXCHANGE_SUFFIXES else ''
+
+
+SymbolRecord = namedtuple('SymbolRecord', DIRECTORY_COLUMNS)
+
+
+class SymbolDirectory:
+    """
+    In-memory hash index of listed symbols -> SymbolRecord(exchange, currency, status).
+
+    The index is loaded from a local CSV (see DIRECTORY_COLUMNS) produced by
+    refresh_from_snapshot. When that file is present it is authoritative for
+    the markets it lists (US, .TO, .V, ...) and unknown symbols on those
+    markets are rejected; otherwise only format checks apply. Metadata
+    learned from live lookups is added to the index for the process lifetime
+    but never makes an empty directory authoritative.
+    """
+
+    def __init__(self, path=SYMBOL_DIRECTORY_PATH):
+        self.path = path
+        self._index = {}
+        self.authoritative = False
+        self.markets = set()
+        self.load()
+
+    def load(self):
+        """(Re)load the directory file; a missing file leaves the directory empty"""
+        if not os.path.exists(self.path):
+            self._index = {}
+            self.authoritative = False
+            self.markets = set()
+            return self
+        df = pd.read_csv(self.path, dtype=str, keep_default_na=False)
+        df = df.reindex(columns=DIRECTORY_COLUMNS, fill_value='')
+        df['symbol'] = df['symbol'].map(normalize_symbol)
+        df['status'] = df['status'].replace('', 'active')
+        self._index = {row.symbol: SymbolRecord(*row[1:]) for row in df.itertuples() if row.symbol}
+        self.authoritative = bool(self._index)
+        self.markets = {_market(symbol) for symbol in self._index}
+        print(f"📒 Loaded symbol directory: {len(self._index)} symbols from {self.path}")
+        return self
+
+    def get(self, symbol):
+        return self._index.get(symbol)
+
+    def currency(self, symbol):
+        record = self._index.get(symbol)
+        return record.currency if record is not None and record.currency else None
+
+    def remember(self, symbol, exchange='', currency='', status='active'):
+        """Cache metadata learned from a live lookup (never overrides the file)"""
+        if symbol not in self._index:
+            self._index[symbol] = SymbolRecord(symbol, exchange or '', currency or '', status)
+
+    def __contains__(self, symbol):
+        return symbol in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+    def validate(self, symbol):
+        """Return None if the normalized symbol is acceptable, else a rejection reason"""
+        if not symbol:
+            return "empty symbol"
+        if not _SYMBOL_RE.match(symbol):
+            suffix = _FOREIGN_SUFFIX_RE.match(symbol)
+            if suffix and suffix.group(1) not in EXCHANGE_SUFFIXES:
+                return f"unsupported exchange (.{suffix.group(1)})"
+            return "invalid symbol format"
+        record = self._index.get(symbol)
+        if record is None:
+            # A directory without e.g. TSX listings must not reject every .TO symbol
+            if self.authoritative and _market(symbol) in self.markets:
+                return "unknown symbol"
+            return None
+        if record.status != 'active':
+            return f"{record.status} listing"
+        if record.currency and record.currency not in ALLOWED_CURRENCIES:
+            return f"wrong currency ({record.currency})"
+        return None
+
+
+def _read_nasdaqlisted(path):
+    df = pd.read_csv(path, sep='|', dtype=str, keep_default_na=False)
+    df = df[(df['Test Issue'] != 'Y') & ~df['Symbol'].str.startswith('File Creation Time')]
+    return pd.DataFrame({
+        'symbol': df['Symbol'],
+        'exchange': 'NASDAQ',
+        'currency': 'USD',
+        'status': 'active',
+    })
+
+
+def _read_otherlisted(path):
+    df = pd.read_csv(path, sep='|', dtype=str, keep_default_na=False)
+    df = df[(df['Test Issue'] != 'Y') & ~df['ACT Symbol'].str.startswith('File Creation Time')]
+    return pd.DataFrame({
+        'symbol': df['ACT Symbol'],
+        'exchange': df['Exchange'].map(_OTHERLISTED_EXCHANGES).fillna(df['Exchange']),
+        'currency': 'USD',
+        'status': 'active',
+    })
+
+
+def _read_snapshot(path):
+    """Parse one snapshot file: NASDAQ Trader symbol files or a directory-style CSV"""
+    with open(path, encoding='utf-8-sig') as f:
+        header = f.readline()
+    if header.startswith('Symbol|'):
+        return _read_nasdaqlisted(path)
+    if header.startswith('ACT Symbol|'):
+        return _read_otherlisted(path)
+    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    df.columns = [c.strip().lower() for c in df.columns]
+    if 'symbol' not in df.columns:
+        raise ValueError(f"{path}: unrecognised snapshot format")
+    df = df.reindex(columns=DIRECTORY_COLUMNS, fill_value='')
+    df['status'] = df['status'].replace('', 'active')
+    return df
+
+
+def refresh_from_snapshot(snapshot_paths, path=SYMBOL_DIRECTORY_PATH):
+    """
+    Rebuild the directory file from downloaded snapshot files, fully offline.
+
+    Accepts NASDAQ Trader nasdaqlisted.txt / otherlisted.txt and CSVs with
+    symbol, exchange, currency[, status] columns (e.g. a TSX listing export
+    with CAD currency and .TO symbols). Later files win on duplicate symbols.
+    The file is replaced atomically so a running server never reads a partial
+    directory.
+    """
+    frames = [_read_snapshot(p) for p in snapshot_paths]
+    df = pd.concat(frames, ignore_index=True)
+    df['symbol'] = df['symbol'].map(normalize_symbol)
+    df = df[df['symbol'].str.match(_SYMBOL_RE)]
+    df = df.drop_duplicates('symbol', keep='last').sort_values('symbol')
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    df[DIRECTORY_COLUMNS].to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    print(f"📒 Wrote {len(df)} symbols to {path}")
+    return len(df)
+
+
+def _tmx_listings(payload, exchange, suffix):
+    """Directory rows from a TMX company-directory JSON payload ('RCI.B' -> 'RCI-B.TO')"""
+    rows = []
+    for company in payload.get('results', []):
+        for instrument in company.get('instruments') or [company]:
+            root = str(instrument.get('symbol') or '').strip().upper().replace('.', '-')
+            if root:
+                rows.append((f"{root}.{suffix}", exchange, 'CAD', 'active'))
+    return pd.DataFrame(rows, columns=DIRECTORY_COLUMNS)
+
+
+def download_snapshots(dest_dir, timeout=30):
+    """
+    Download current US (NASDAQ Trader) and Canadian (TMX) listings into
+    dest_dir. Sources that fail are reported and skipped; returns the paths
+    of the snapshot files that were written.
+    """
+    import requests
+
+    paths = []
+    for filename, url in NASDAQ_TRADER_URLS.items():
+        try:
+            response = requests.get(url, timeout=timeout)
+            response.raise_for_status()
+            path = os.path.join(dest_dir, filename)
+            with open(path, 'wb') as f:
+                f.write(response.content)
+            paths.append(path)
+        except Exception as e:
+            print(f"⚠️  Could not download {url}: {e}")
+    for market, (exchange, suffix) in TMX_MARKETS.items():
+        url = TMX_DIRECTORY_URL.format(market=market)
+        try:
+            response = requests.get(url, timeout=timeout, headers={'User-Agent': 'Mozilla/5.0'})
+            response.raise_for_status()
+            listings = _tmx_listings(json.loads(response.content), exchange, suffix)
+            if listings.empty:
+                raise ValueError("no listings in response")
+            path = os.path.join(dest_dir, f"{market}.csv")
+            listings.to_csv(path, index=False)
+            paths.append(path)
+        except Exception as e:
+            print(f"⚠️  Could not download {url}: {e}")
+    return paths
+
+
+def refresh_from_download(path=SYMBOL_DIRECTORY_PATH):
+    """Download listings and rebuild the directory; keeps the old file if nothing downloaded"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        snapshots = download_snapshots(tmp_dir)
+        if not snapshots:
+            raise RuntimeError("No listing source could be downloaded; symbol directory left unchanged")
+        return refresh_from_snapshot(snapshots, path)
+
+
+class SymbolScreen:
+    """
+    Incremental normalize -> dedupe -> validate pass over raw ticker values.
+
+    Holds only the set of accepted symbols and the first max_rejects rejects
+    (all of them if None), so feeding it a stream of rows costs memory
+    proportional to the number of distinct valid symbols, not the input size.
+    """
+
+    def __init__(self, directory, max_rejects=None):
+        self.directory = directory
+        self.max_rejects = max_rejects
+        self.accepted = []
+        self.rejected = []
+        self._seen = set()
+        self.rows = 0
+        self.duplicates = 0
+        self.total_rejected = 0
+
+    def add(self, raw):
+        self.rows += 1
+        symbol = normalize_symbol(raw)
+        if symbol in self._seen:
+            self.duplicates += 1
+            return
+        reason = self.directory.validate(symbol)
+        if reason is not None:
+            self.total_rejected += 1
+            if self.max_rejects is None or len(self.rejected) < self.max_rejects:
+                self.rejected.append({"symbol": str(raw).strip(), "reason": reason})
+            return
+        self._seen.add(symbol)
+        self.accepted.append(symbol)
+
+    def extend(self, values):
+        for raw in values:
+            self.add(raw)
+        return self
+
+    def removed_messages(self):
+        """Rejects in the 'SYMBOL - reason' form used by remove_unwanted"""
+        return [f"{r['symbol']} - {r['reason']}" for r in self.rejected]
+
+
+def iter_csv_symbols(stream, chunksize=CSV_CHUNK_ROWS, header=True):
+    """
+    Yield raw first-column values from a CSV stream, chunk by chunk.
+
+    With header=True the first row is the column header and is skipped,
+    as with a plain pd.read_csv; pass header=False for bare ticker lists.
+    """
+    reader = pd.read_csv(
+        stream,
+        header=0 if header else None,
+        usecols=[0],
+        dtype=str,
+        chunksize=chunksize,
+        skip_blank_lines=True,
+        encoding='utf-8-sig',
+        encoding_errors='replace'
+    )
+    for chunk in reader:
+        yield from chunk.iloc[:, 0].dropna()
+
+
+def screen_csv(stream, directory, chunksize=CSV_CHUNK_ROWS, header=True):
+    """Stream a ticker CSV through a SymbolScreen"""
+    screen = SymbolScreen(directory, max_rejects=MAX_REPORTED_REJECTS)
+    return screen.extend(iter_csv_symbols(stream, chunksize, header))
+
+
+if __name__ == '__main__':
+    # python symbols.py download
+    # python symbols.py refresh nasdaqlisted.txt otherlisted.txt tsx.csv
+    if len(sys.argv) == 2 and sys.argv[1] == 'download':
+        try:
+            refresh_from_download()
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+    elif len(sys.argv) >= 3 and sys.argv[1] == 'refresh':
+        refresh_from_snapshot(sys.argv[2:])
+    else:
+        print("usage: python symbols.py download | refresh SNAPSHOT [SNAPSHOT ...]")
+        sys.exit(1)
@@ -0,0 +1,94 @@
+import threading
+
+from app import MarketMatchAnalyzer
+from symbols import SymbolDirectory
+
+
+def make_analyzer(tmp_path):
+    return MarketMatchAnalyzer(SymbolDirectory(str(tmp_path / 'symbols.csv')), max_workers=2)
+
+
+def test_overrides_leave_shared_analyzer_untouched(tmp_path):
+    analyzer = make_analyzer(tmp_path)
+    view = analyzer.with_overrides(start_date='2020-01-01', ridge_alpha='0.5', returns_weight=0)
+    assert (view.start_date, view.ridge_alpha, view.returns_weight) == ('2020-01-01', 0.5, 0.0)
+    assert (analyzer.start_date, analyzer.ridge_alpha, analyzer.returns_weight) == ('2021-01-01', 0.1, 0.001)
+
+
+def test_apply_config_swaps_scoring_atomically(tmp_path):
+    analyzer = make_analyzer(tmp_path)
+    view = analyzer.with_overrides()
+    configs = [
+        {'market_value_weight': 2.0, 'returns_weight': 2.0, 'tracking_error_weight': 2.0, 'ridge_alpha': 2.0},
+        {'market_value_weight': 3.0, 'returns_weight': 3.0, 'tracking_error_weight': 3.0, 'ridge_alpha': 3.0},
+    ]
+    stop = threading.Event()
+    torn = []
+
+    def reader():
+        while not stop.is_set():
+            scoring = analyzer.scoring
+            applied = {scoring.market_value_weight, scoring.returns_weight,
+                       scoring.tracking_error_weight, scoring.ridge_alpha}
+            if len(applied) != 1 and scoring.ridge_alpha != 0.1:
+                torn.append(scoring)
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    for i in range(2000):
+        analyzer.apply_config(configs[i % 2])
+    stop.set()
+    thread.join()
+
+    assert not torn
+    assert analyzer.ridge_alpha == 3.0
+    # Tuning only searches the standardised Ridge alpha
+    assert analyzer.selection_alpha == 0.1
+    assert view.ridge_alpha == 0.1
+
+
+def test_failed_daily_closes_are_retried(tmp_path):
+    import numpy as np
+    import pandas as pd
+
+    analyzer = make_analyzer(tmp_path)
+    index = pd.bdate_range('2021-01-01', periods=5)
+    downloads = []
+
+    def download(symbols, start_date, end_date):
+        downloads.append(list(symbols))
+        if len(downloads) == 1:
+            # Rate-limited: one symbol missing, one all-NaN
+            return {'AAA': pd.Series(np.arange(5.0), index=index), 'BBB': pd.Series(np.nan, index=index)}
+        return {symbol: pd.Series(np.arange(5.0), index=index) for symbol in symbols}
+
+    analyzer._download_daily_closes = download
+    first = analyzer.get_daily_closes(['AAA', 'BBB', 'CCC'], '2021-01-01', '2021-02-01')
+    second = analyzer.get_daily_closes(['AAA', 'BBB', 'CCC'], '2021-01-01', '2021-02-01')
+
+    assert list(first.columns) == ['AAA']
+    assert list(second.columns) == ['AAA', 'BBB', 'CCC']
+    assert downloads == [['AAA', 'BBB', 'CCC'], ['BBB', 'CCC']]
+
+
+def test_backtest_ignores_dates_before_a_late_starter(tmp_path):
+    import pandas as pd
+
+    analyzer = make_analyzer(tmp_path)
+    index = pd.bdate_range('2018-01-01', '2020-12-30')
+    flat = pd.Series(10.0, index=index)
+    ipo = pd.Series(50.0, index=index[index >= '2019-06-03'])
+
+    def download(symbols, start_date, end_date):
+        series = {'AAA.TO': flat, 'IPO.TO': ipo, 'XIU.TO': flat, '^GSPC': flat, 'CADUSD=X': flat / 10}
+        return {symbol: series[symbol] for symbol in symbols}
+
+    analyzer._download_daily_closes = download
+    for symbol in ('AAA.TO', 'IPO.TO'):
+        analyzer.symbols.remember(symbol, 'TSX', 'CAD')
+    portfolio = pd.DataFrame({'Ticker': ['AAA.TO', 'IPO.TO'], 'Weight': [50.0, 50.0]})
+
+    result = analyzer.backtest_portfolio(portfolio)
+    assert result['portfolio_return_pct'] == 0.0
+    assert result['dates'][0] >= '2019-06-01'
+    assert set(result['portfolio_index']) == {1.0}
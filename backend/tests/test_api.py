@@ -0,0 +1,54 @@
+import pytest
+
+import app
+
+
+@pytest.fixture
+def client():
+    return app.app.test_client()
+
+
+@pytest.mark.parametrize('body', [
+    {'apply': True},
+    {'persist': True},
+    {'workers': 'x'},
+    {'workers': 64},
+    {'n_iter': 10 ** 9},
+    {'n_splits': 1.5},
+    {'seed': 'abc'},
+    {'alphas': ['a']},
+])
+def test_tune_rejects_bad_input(client, body):
+    response = client.post('/api/tune', json={'tickers': ['AAPL'], **body})
+    assert response.status_code == 400
+    assert 'traceback' not in response.get_json()
+
+
+@pytest.mark.parametrize('body', [
+    {'block_length': 'abc'},
+    {'block_length': 0},
+    {'seed': 'abc'},
+    {'n_resamples': '2k'},
+    {'confidence': 'high'},
+    {'confidence': 1.5},
+    {'tickers': [f"T{i}" for i in range(100)]},
+])
+def test_weight_stability_rejects_bad_input(client, body):
+    response = client.post('/api/weight-stability', json={'tickers': ['AAPL', 'MSFT'], **body})
+    assert response.status_code == 400
+    assert 'traceback' not in response.get_json()
+
+
+@pytest.mark.parametrize('overrides', [
+    {'ridge_alpha': -1},
+    {'ridge_alpha': 0},
+    {'ridge_alpha': 'nan'},
+    {'selection_alpha': 'inf'},
+    {'returns_weight': -0.5},
+    {'market_value_weight': 'nan'},
+    {'tracking_error_weight': True},
+])
+def test_weight_stability_rejects_bad_overrides(client, overrides):
+    response = client.post('/api/weight-stability', json={'tickers': ['AAPL', 'MSFT'], 'overrides': overrides})
+    assert response.status_code == 400
+    assert 'Invalid overrides' in response.get_json()['error']
@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+from batch import BatchRun, STATE_FILE
+
+
+def test_restart_refuses_directory_without_run_state(tmp_path):
+    (tmp_path / 'keep.txt').write_text('not ours')
+    with pytest.raises(ValueError):
+        BatchRun(str(tmp_path), 'abc', restart=True)
+    assert (tmp_path / 'keep.txt').exists()
+
+
+def test_restart_refuses_foreign_run_json(tmp_path):
+    (tmp_path / STATE_FILE).write_text('{"name": "something else"}')
+    with pytest.raises(ValueError):
+        BatchRun(str(tmp_path), 'abc', restart=True)
+    assert (tmp_path / STATE_FILE).exists()
+
+
+def test_restart_removes_only_run_outputs(tmp_path):
+    (tmp_path / STATE_FILE).write_text(json.dumps({'fingerprint': 'old', 'stages': {'screen': {}}}))
+    (tmp_path / 'screen').mkdir()
+    (tmp_path / 'screen' / 'accepted.parquet').write_bytes(b'x')
+    (tmp_path / 'rate').mkdir()
+    (tmp_path / 'rate' / 'part-00000.parquet').write_bytes(b'x')
+    (tmp_path / 'rate' / 'notes.txt').write_text('user file')
+    (tmp_path / 'weights.parquet').write_bytes(b'x')
+    (tmp_path / 'README').write_text('user file')
+
+    run = BatchRun(str(tmp_path), 'new', restart=True)
+
+    assert run.state == {'fingerprint': 'new', 'stages': {}}
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['README', 'rate']
+    assert [p.name for p in (tmp_path / 'rate').iterdir()] == ['notes.txt']
+
+
+def test_resume_rejects_different_inputs(tmp_path):
+    (tmp_path / STATE_FILE).write_text(json.dumps({'fingerprint': 'old', 'stages': {}}))
+    with pytest.raises(ValueError):
+        BatchRun(str(tmp_path), 'new')
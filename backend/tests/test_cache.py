@@ -0,0 +1,93 @@
+import threading
+import time
+
+import pytest
+
+from cache import SingleFlightCache
+
+
+def test_get_many_fills_only_missing_keys():
+    cache = SingleFlightCache()
+    calls = []
+
+    def fill(keys):
+        calls.append(list(keys))
+        return {key: key.upper() for key in keys}
+
+    assert cache.get_many(['a', 'b'], fill) == {'a': 'A', 'b': 'B'}
+    assert cache.get_many(['a', 'b', 'c'], fill) == {'a': 'A', 'b': 'B', 'c': 'C'}
+    assert calls == [['a', 'b'], ['c']]
+
+
+def test_hits_survive_clear_during_fill():
+    cache = SingleFlightCache()
+    cache.get_many(['a', 'b'], lambda keys: {key: 1 for key in keys})
+
+    def fill(keys):
+        cache.clear()
+        return {key: 2 for key in keys}
+
+    assert cache.get_many(['a', 'b', 'c'], fill) == {'a': 1, 'b': 1, 'c': 2}
+
+
+def test_concurrent_misses_fill_once():
+    cache = SingleFlightCache()
+    calls = []
+    start = threading.Barrier(8)
+
+    def fill(keys):
+        calls.extend(keys)
+        time.sleep(0.05)
+        return {key: len(key) for key in keys}
+
+    results = []
+
+    def worker(keys):
+        start.wait()
+        results.append(cache.get_many(keys, fill))
+
+    threads = [threading.Thread(target=worker, args=(['x', 'yy'] if i % 2 else ['yy', 'zzz'],))
+               for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(calls) == ['x', 'yy', 'zzz']
+    assert all(result == {key: len(key) for key in result} for result in results)
+
+
+def test_fill_error_reaches_waiters_and_is_not_cached():
+    cache = SingleFlightCache()
+
+    def failing(keys):
+        raise RuntimeError("rate limited")
+
+    with pytest.raises(RuntimeError):
+        cache.get('a', lambda: failing(['a']))
+    assert 'a' not in cache
+    assert cache.get('a', lambda: 1) == 1
+
+
+def test_keys_missing_from_fill_are_not_cached():
+    cache = SingleFlightCache()
+    assert cache.get_many(['a', 'b'], lambda keys: {'a': 1}) == {'a': 1, 'b': None}
+    assert 'b' not in cache
+    assert cache.get_many(['a', 'b'], lambda keys: {key: 2 for key in keys}) == {'a': 1, 'b': 2}
+
+
+def test_least_recently_used_entries_are_evicted_past_max_size():
+    cache = SingleFlightCache(max_size=2)
+    cache.get_many(['a', 'b'], lambda keys: {key: key for key in keys})
+    assert cache.get('a', lambda: 'unused') == 'a'
+    assert cache.get('c', lambda: 'c') == 'c'
+    assert cache.keys() == ['a', 'c']
+
+
+def test_max_size_counts_sizeof():
+    cache = SingleFlightCache(max_size=10, sizeof=len)
+    assert cache.get_many(['a', 'b'], lambda keys: {'a': 'x' * 6, 'b': 'y' * 6}) == {'a': 'x' * 6, 'b': 'y' * 6}
+    assert cache.keys() == ['b']
+    assert cache.size == 6
+    cache.discard(['b'])
+    assert cache.size == 0
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import app
+from responses import COLUMNAR_MIMETYPE
+from symbols import SymbolDirectory
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    analyzer = app.MarketMatchAnalyzer(SymbolDirectory(str(tmp_path / 'symbols.csv')), max_workers=2)
+    index = pd.bdate_range(analyzer.start_date, analyzer.end_date)
+    rng = np.random.default_rng(0)
+    downloads = []
+
+    def download(symbols, start_date, end_date):
+        downloads.append(list(symbols))
+        return {symbol: pd.Series(100 + rng.normal(0, 1, len(index)).cumsum(), index=index) for symbol in symbols}
+
+    analyzer._download_daily_closes = download
+    monkeypatch.setattr(app, 'analyzer', analyzer)
+    client = app.app.test_client()
+    client.downloads = downloads
+    return client
+
+
+def count_builds(monkeypatch):
+    builds = []
+    build = app._market_data_response
+
+    def counting(*args):
+        builds.append(args)
+        return build(*args)
+
+    monkeypatch.setattr(app, '_market_data_response', counting)
+    return builds
+
+
+def test_health_etag_and_304(client):
+    response = client.get('/api/health')
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    assert app.BOOT_ID in etag
+
+    response = client.get('/api/health', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.get_data() == b''
+
+
+def test_market_data_etag_varies_with_frequency_and_representation(client):
+    etags = {
+        client.get('/api/market-data?frequency=1mo').headers['ETag'],
+        client.get('/api/market-data?frequency=1wk').headers['ETag'],
+        client.get('/api/market-data?frequency=1mo&format=columnar').headers['ETag'],
+        client.get('/api/market-data?frequency=1mo', headers={'Accept': COLUMNAR_MIMETYPE}).headers['ETag'],
+    }
+    assert len(etags) == 3
+    response = client.get('/api/market-data?frequency=1mo')
+    assert response.headers['ETag'] in etags
+    assert 'Accept' in response.headers['Vary']
+    # Both frequencies were resampled from one daily download
+    assert len(client.downloads) == 1
+
+
+def test_if_none_match_skips_rebuilding_the_payload(client, monkeypatch):
+    builds = count_builds(monkeypatch)
+    response = client.get('/api/market-data')
+    assert response.status_code == 200
+    assert len(builds) == 1
+
+    response = client.get('/api/market-data', headers={'If-None-Match': response.headers['ETag']})
+    assert response.status_code == 304
+    assert response.get_data() == b''
+    assert len(builds) == 1
+
+    # A different representation has a different ETag, so it is rebuilt
+    response = client.get('/api/market-data?format=columnar', headers={'If-None-Match': response.headers['ETag']})
+    assert response.status_code == 200
+    assert len(builds) == 2
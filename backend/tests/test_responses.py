@@ -0,0 +1,52 @@
+import gzip
+import json
+import math
+
+import pytest
+from flask import Flask, Response
+
+from responses import COLUMNAR_MIMETYPE, MIN_COMPRESS_SIZE, compress_response, encode
+
+app = Flask(__name__)
+
+
+@pytest.mark.parametrize('query, headers', [
+    ('?format=columnar', {}),
+    ('', {'Accept': COLUMNAR_MIMETYPE}),
+])
+def test_columnar_encode_turns_nan_into_null(query, headers):
+    payload = {'backtest': {'correlation': math.nan, 'index': [1.0, math.inf]}, 'n': 2}
+    with app.test_request_context('/' + query, headers=headers):
+        response = encode(payload)
+    assert response.status_code == 200
+    assert json.loads(response.get_data()) == {'backtest': {'correlation': None, 'index': [1.0, None]}, 'n': 2}
+
+
+def compressed(body, mimetype='application/json', **headers):
+    with app.test_request_context('/', headers=headers):
+        return compress_response(Response(body, mimetype=mimetype))
+
+
+def test_gzip_is_used_when_brotli_is_not_acceptable():
+    body = b'{"x": 1}' * 500
+    response = compressed(body, **{'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert gzip.decompress(response.get_data()) == body
+
+
+def test_brotli_is_preferred_when_available():
+    brotli = pytest.importorskip('brotli')
+    body = b'{"x": 1}' * 500
+    response = compressed(body, **{'Accept-Encoding': 'gzip, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert brotli.decompress(response.get_data()) == body
+
+
+def test_small_unacceptable_or_binary_bodies_are_left_alone():
+    small = b'x' * (MIN_COMPRESS_SIZE - 1)
+    assert 'Content-Encoding' not in compressed(small, **{'Accept-Encoding': 'gzip'}).headers
+    large = b'x' * MIN_COMPRESS_SIZE
+    assert compressed(large, **{'Accept-Encoding': 'gzip'}).headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Encoding' not in compressed(large).headers
+    assert 'Content-Encoding' not in compressed(large, 'image/png', **{'Accept-Encoding': 'gzip'}).headers
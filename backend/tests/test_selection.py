@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from selection import IncrementalRidge, select_tracking_portfolio
+
+
+def direct_fit(X, y, lam, subset):
+    X_s = X[:, subset]
+    w = np.linalg.solve(X_s.T @ X_s + lam * np.eye(len(subset)), X_s.T @ y)
+    objective = float(np.sum((y - X_s @ w) ** 2) + lam * w @ w)
+    return w, objective
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(1)
+    X = rng.normal(0, 0.02, size=(60, 25))
+    y = X[:, :6].mean(axis=1) + rng.normal(0, 0.002, size=60)
+    return X, y
+
+
+def test_incremental_ridge_matches_direct_solve_after_adds_and_removes(data):
+    X, y = data
+    lam = 1e-3
+    model = IncrementalRidge(X, y, lam, capacity=8)
+    steps = [('add', 3), ('add', 7), ('add', 0), ('add', 12), ('remove', 1),
+             ('add', 19), ('add', 5), ('remove', 0), ('remove', 2), ('add', 22), ('add', 7)]
+    for action, arg in steps:
+        if action == 'add':
+            model.add(arg)
+        else:
+            model.remove(arg)
+        w, objective = direct_fit(X, y, lam, model.selected)
+        np.testing.assert_allclose(model.weights(), w, rtol=1e-9, atol=1e-12)
+        assert model.objective == pytest.approx(objective, rel=1e-9, abs=1e-14)
+
+
+def test_candidate_scores_predict_objective_drop(data):
+    X, y = data
+    lam = 1e-3
+    model = IncrementalRidge(X, y, lam, capacity=4)
+    model.add(2)
+    model.add(9)
+    scores = model.candidate_scores()
+    for j in (0, 4, 17):
+        _, objective = direct_fit(X, y, lam, model.selected + [j])
+        assert model.objective - scores[j] ** 2 == pytest.approx(objective, rel=1e-9)
+    assert np.isnan(scores[[2, 9]]).all()
+
+
+def test_snapshot_restore_round_trip(data):
+    X, y = data
+    model = IncrementalRidge(X, y, 1e-3, capacity=5)
+    for j in (1, 4, 6):
+        model.add(j)
+    state = model.snapshot()
+    before = model.weights().copy()
+    model.remove(1)
+    model.add(10)
+    model.restore(state)
+    assert model.selected == [1, 4, 6]
+    np.testing.assert_allclose(model.weights(), before)
+
+
+def test_select_tracking_portfolio_returns_k_distinct_names(data):
+    X, y = data
+    result = select_tracking_portfolio(X, y, k=6)
+    assert len(result.indices) == 6
+    assert len(set(result.indices.tolist())) == 6
+    assert result.tracking_error < y.std()
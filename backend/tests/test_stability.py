@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from sklearn.linear_model import Ridge
+from sklearn.preprocessing import StandardScaler
+
+import stability
+from selection import constrain_weights
+
+
+def test_bootstrap_ridge_coefficients_match_sklearn_on_expanded_resamples():
+    rng = np.random.default_rng(1)
+    X = rng.normal(0, 0.02, size=(60, 8))
+    y = X.mean(axis=1) + rng.normal(0, 0.002, size=60)
+    n_obs, n = X.shape
+    alpha = 0.3
+    rng = np.random.default_rng(0)
+    counts = stability.block_bootstrap_counts(n_obs, 5, block_length=4, rng=rng)
+    assert (counts.sum(axis=1) == n_obs).all()
+
+    coefs = stability._ridge_coefficients(counts, X, y, alpha)
+    for row, count in zip(coefs, counts):
+        X_rep = np.repeat(X, count, axis=0)
+        y_rep = np.repeat(y, count)
+        expected = Ridge(alpha=alpha, fit_intercept=False).fit(StandardScaler().fit_transform(X_rep), y_rep).coef_
+        np.testing.assert_allclose(row, expected, rtol=1e-8, atol=1e-10)
+
+
+def test_constrain_weights_batch_matches_scalar_version():
+    rng = np.random.default_rng(3)
+    W = rng.normal(0, 1, size=(50, 12))
+    W[0] = -1  # all negative -> equal weights
+    min_weight, max_weight = 1 / 24, 0.15
+    batch = stability.constrain_weights_batch(W, min_weight, max_weight)
+    for raw, row in zip(W, batch):
+        np.testing.assert_allclose(row, constrain_weights(raw.copy(), min_weight, max_weight), atol=1e-12)
+
+
+def test_row_chunks_and_small_batches_give_the_same_result(monkeypatch):
+    rng = np.random.default_rng(2)
+    X = rng.normal(0, 0.02, size=(80, 6))
+    y = X.mean(axis=1) + rng.normal(0, 0.002, size=80)
+    expected = stability.bootstrap_weights(X, y, n_resamples=40, seed=5)
+
+    # 3 rows of outer products per chunk, a handful of resamples per batch
+    monkeypatch.setattr(stability, 'BATCH_MEMORY_BYTES', 8 * 6 * 6 * 3)
+    chunked = stability.bootstrap_weights(X, y, n_resamples=40, seed=5)
+    for a, b in zip(expected[:3], chunked[:3]):
+        np.testing.assert_allclose(a, b, rtol=1e-9, atol=1e-12)
+
+
+def test_long_windows_are_rejected():
+    X = np.zeros((stability.MAX_OBSERVATIONS + 1, 2))
+    with pytest.raises(ValueError):
+        stability.bootstrap_weights(X, X[:, 0])
@@ -0,0 +1,69 @@
+import gzip
+
+import pytest
+from flask import Flask
+
+import static_files
+from static_files import IMMUTABLE_MAX_AGE, StaticManifest
+
+app = Flask(__name__)
+JS = b'console.log(1);' * 500
+
+
+@pytest.fixture
+def build(tmp_path):
+    (tmp_path / 'static' / 'js').mkdir(parents=True)
+    (tmp_path / 'index.html').write_text('<html>' + 'x' * 2000 + '</html>')
+    (tmp_path / 'static' / 'js' / 'main.3f2a1b9c.js').write_bytes(JS)
+    (tmp_path / 'static' / 'js' / 'main.3f2a1b9c.js.gz').write_bytes(gzip.compress(JS, 9))
+    return tmp_path
+
+
+def serve(manifest, path, **headers):
+    with app.test_request_context('/' + path, headers=headers):
+        asset = manifest.lookup(path or 'index.html')
+        return None if asset is None else manifest.response(asset)
+
+
+def test_scan_is_deferred_until_first_use(build):
+    manifest = StaticManifest(str(build))
+    assert manifest._assets is None
+    assert manifest.top_level() == ['index.html', 'static']
+
+
+def test_hashed_asset_uses_precompressed_variant_and_is_immutable(build):
+    manifest = StaticManifest(str(build))
+    response = serve(manifest, 'static/js/main.3f2a1b9c.js', **{'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.get_data()) == JS
+    assert response.cache_control.immutable
+    assert response.cache_control.max_age == IMMUTABLE_MAX_AGE
+    assert 'static/js/main.3f2a1b9c.js.gz' not in manifest.assets
+
+    etag = response.headers['ETag']
+    response = serve(manifest, 'static/js/main.3f2a1b9c.js', **{'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert response.status_code == 304
+
+
+def test_spa_fallback_and_static_misses(build):
+    manifest = StaticManifest(str(build))
+    response = serve(manifest, 'optimize/deep/link')
+    assert response.mimetype == 'text/html'
+    assert response.cache_control.no_cache
+    assert serve(manifest, 'static/js/old.12345678.js') is None
+
+
+def test_large_compressible_file_gets_encoded_variant(build, monkeypatch):
+    monkeypatch.setattr(static_files, 'MAX_MEMORY_SIZE', 1024)
+    source_map = b'{"mappings": "' + b'AAAA;' * 2000 + b'"}'
+    (build / 'static' / 'js' / 'main.3f2a1b9c.js.map').write_bytes(source_map)
+    manifest = StaticManifest(str(build))
+
+    asset = manifest.assets['static/js/main.3f2a1b9c.js.map']
+    assert isinstance(asset.variants['identity'], str)
+    response = serve(manifest, 'static/js/main.3f2a1b9c.js.map', **{'Accept-Encoding': 'gzip'})
+    assert gzip.decompress(response.get_data()) == source_map
+
+
+def test_missing_build_is_empty(tmp_path):
+    assert not StaticManifest(str(tmp_path / 'missing'))
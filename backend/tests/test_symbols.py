@@ -0,0 +1,82 @@
+import pytest
+
+import symbols
+from symbols import SymbolDirectory, refresh_from_snapshot
+
+
+def make_directory(tmp_path, rows):
+    snapshot = tmp_path / 'snapshot.csv'
+    snapshot.write_text('symbol,exchange,currency,status\n' + '\n'.join(rows) + '\n')
+    path = str(tmp_path / 'symbols.csv')
+    refresh_from_snapshot([str(snapshot)], path)
+    return SymbolDirectory(path)
+
+
+def test_directory_only_rejects_unknown_symbols_on_covered_markets(tmp_path):
+    directory = make_directory(tmp_path, ['AAPL,NASDAQ,USD,active', 'OLD,NYSE,USD,delisted'])
+    assert directory.validate('AAPL') is None
+    assert directory.validate('ZZZZ') == "unknown symbol"
+    assert directory.validate('OLD') == "delisted listing"
+    # No TSX listings in the file, so .TO symbols are left to live lookups
+    assert directory.validate('RY.TO') is None
+
+
+def test_missing_directory_is_not_authoritative(tmp_path):
+    directory = SymbolDirectory(str(tmp_path / 'missing.csv'))
+    assert not directory.authoritative
+    assert directory.validate('ZZZZ') is None
+
+
+def test_tmx_listings_use_yahoo_symbols():
+    payload = {'results': [
+        {'symbol': 'RCI', 'instruments': [{'symbol': 'RCI.A'}, {'symbol': 'RCI.B'}]},
+        {'symbol': 'REI.UN', 'instruments': []},
+    ]}
+    listings = symbols._tmx_listings(payload, 'TSX', 'TO')
+    assert listings['symbol'].tolist() == ['RCI-A.TO', 'RCI-B.TO', 'REI-UN.TO']
+    assert set(listings['currency']) == {'CAD'}
+
+
+def test_download_keeps_existing_directory_when_all_sources_fail(tmp_path, monkeypatch):
+    requests = pytest.importorskip('requests')
+
+    def fail(*args, **kwargs):
+        raise requests.ConnectionError("offline")
+
+    monkeypatch.setattr(requests, 'get', fail)
+    path = tmp_path / 'symbols.csv'
+    path.write_text('symbol,exchange,currency,status\nAAPL,NASDAQ,USD,active\n')
+    with pytest.raises(RuntimeError):
+        symbols.refresh_from_download(str(path))
+    assert 'AAPL' in path.read_text()
+
+
+@pytest.mark.parametrize('raw, expected', [
+    (' brk.b ', 'BRK-B'),
+    ('RCI.B.TO', 'RCI-B.TO'),
+    ('bam.a.to', 'BAM-A.TO'),
+    ('GIB.A.TO', 'GIB-A.TO'),
+    ('REI.UN.TO', 'REI-UN.TO'),
+    ('RY.TO', 'RY.TO'),
+    ('HDFC.NS', 'HDFC.NS'),
+])
+def test_normalize_symbol(raw, expected):
+    assert symbols.normalize_symbol(raw) == expected
+
+
+def test_canadian_class_shares_are_accepted(tmp_path):
+    directory = SymbolDirectory(str(tmp_path / 'missing.csv'))
+    assert directory.validate(symbols.normalize_symbol('RCI.B.TO')) is None
+
+
+def test_csv_first_row_is_header_unless_disabled(tmp_path):
+    import io
+
+    data = b'Stock\nAAPL\nmsft\nAAPL\n'
+    directory = SymbolDirectory(str(tmp_path / 'missing.csv'))
+    screen = symbols.screen_csv(io.BytesIO(data), directory)
+    assert screen.accepted == ['AAPL', 'MSFT']
+    assert screen.duplicates == 1
+
+    screen = symbols.screen_csv(io.BytesIO(data), directory, header=False)
+    assert screen.accepted == ['STOCK', 'AAPL', 'MSFT']
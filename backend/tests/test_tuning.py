@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from sklearn.linear_model import Ridge
+
+import tuning
+from app import MarketMatchAnalyzer
+from symbols import SymbolDirectory
+
+
+@pytest.fixture
+def universe():
+    rng = np.random.default_rng(4)
+    X = rng.normal(0, 0.02, size=(72, 15))
+    y = X[:, :5].mean(axis=1) + rng.normal(0, 0.002, size=72)
+    market_value_scores = rng.uniform(0, 1, size=15)
+    return X, y, market_value_scores
+
+
+def configs_of(ranked):
+    return [{key: value for key, value in entry.items() if key != 'cv_tracking_error'} for entry in ranked]
+
+
+def test_ridge_path_matches_sklearn():
+    rng = np.random.default_rng(0)
+    Z = rng.normal(size=(40, 7))
+    y = rng.normal(size=40)
+    alphas = [0.001, 0.1, 1.0, 30.0]
+    path = tuning.ridge_path(Z, y, alphas)
+    for alpha, coef in zip(alphas, path):
+        expected = Ridge(alpha=alpha, fit_intercept=False).fit(Z, y).coef_
+        np.testing.assert_allclose(coef, expected, rtol=1e-9, atol=1e-12)
+
+
+def test_pooled_search_ranks_like_in_process_search(universe):
+    X, y, market_value_scores = universe
+    configs = tuning.random_configs(12, seed=1)
+    alphas = [0.01, 0.1, 1.0]
+    serial = tuning.search(X, y, market_value_scores, 5, configs, alphas=alphas, n_splits=3, max_workers=1)
+    pooled = tuning.search(X, y, market_value_scores, 5, configs, alphas=alphas, n_splits=3, max_workers=2)
+    assert configs_of(pooled) == configs_of(serial)
+    np.testing.assert_allclose([e['cv_tracking_error'] for e in pooled],
+                               [e['cv_tracking_error'] for e in serial], rtol=1e-12)
+    errors = [entry['cv_tracking_error'] for entry in serial]
+    assert errors == sorted(errors)
+
+
+def test_saved_config_round_trips_into_the_analyzer(tmp_path):
+    best = {'market_value_weight': 3.0, 'returns_weight': 0.01, 'tracking_error_weight': 0.3,
+            'ridge_alpha': 1.0, 'cv_tracking_error': 0.02}
+    path = str(tmp_path / 'data' / 'tuned_config.json')
+    assert tuning.load_config(path) is None
+    tuning.save_config({'best': best, 'frequency': '1mo'}, path)
+    loaded = tuning.load_config(path)
+    assert loaded['best'] == best
+
+    analyzer = MarketMatchAnalyzer(SymbolDirectory(str(tmp_path / 'symbols.csv')), max_workers=1)
+    analyzer.apply_config(loaded['best'])
+    assert analyzer.scoring._replace(selection_alpha=None) == (3.0, 0.01, 0.3, 1.0, None)
@@ -0,0 +1,263 @@
+"""
+Hyperparameter search for the Ridge alpha and the rating weights.
+
+Each configuration is scored by walk-forward (time-series) cross-validation
+of the whole selection pipeline: rate on the training fold, take the top
+num_stocks, fit Ridge on standardised returns, apply the weight constraints
+and measure tracking error on the following validation fold.
+
+    python tuning.py ../Tickers.csv --frequency 1mo --search random --n-iter 300
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+from sklearn.model_selection import TimeSeriesSplit
+
+from selection import constrain_weights
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+TUNED_CONFIG_PATH = os.environ.get(
+    'TUNED_CONFIG_PATH', os.path.join(BACKEND_DIR, 'data', 'tuned_config.json')
+)
+
+DEFAULT_ALPHAS = [0.001, 0.003, 0.01, 0.03, 0.1, 0.3, 1.0, 3.0, 10.0, 30.0, 100.0]
+DEFAULT_GRID = {
+    'market_value_weight': [0.1, 0.3, 1.0, 3.0, 10.0],
+    'returns_weight': [0.0, 0.0001, 0.001, 0.01],
+    'tracking_error_weight': [0.01, 0.03, 0.1, 0.3, 1.0],
+}
+# Log-uniform ranges for random search (only the grid tries returns_weight = 0)
+RANDOM_RANGES = {
+    'market_value_weight': (0.01, 100.0),
+    'returns_weight': (1e-5, 0.1),
+    'tracking_error_weight': (0.001, 10.0),
+}
+RATING_PARAMS = ['market_value_weight', 'returns_weight', 'tracking_error_weight']
+MAX_WEIGHT = 0.15
+
+# Per-worker state, set once by _init_worker so tasks only ship config indices
+_STATE = {}
+
+
+def ridge_path(Z, y, alphas):
+    """
+    Ridge coefficients for every alpha from one thin SVD of Z.
+
+    With Z = U S V', w(alpha) = V diag(s / (s^2 + alpha)) U'y, so the cost
+    beyond the SVD is O(n_alphas * p^2). Returns an (n_alphas, p) array.
+    """
+    U, s, Vt = np.linalg.svd(Z, full_matrices=False)
+    Uty = U.T @ y
+    shrink = s / (s[None, :] ** 2 + np.asarray(alphas)[:, None])
+    return (shrink * Uty) @ Vt
+
+
+def rating_components(X_train, y_train, market_value_scores):
+    """Per-stock (market value, returns, tracking error) scores on a training fold"""
+    market_returns = y_train.mean()
+    returns_diff = np.abs(X_train.mean(axis=0) - market_returns)
+    tracking_error = (X_train - market_returns).std(axis=0, ddof=1)
+    with np.errstate(divide='ignore'):
+        returns_score = np.where(returns_diff > 0, 1 / returns_diff, 0)
+        tracking_error_score = np.where(tracking_error > 0, 1 / tracking_error, 0)
+    return np.column_stack([market_value_scores, returns_score, tracking_error_score])
+
+
+def make_folds(X, y, market_value_scores, n_splits):
+    """Walk-forward folds with training columns standardised once per fold"""
+    folds = []
+    for train_idx, val_idx in TimeSeriesSplit(n_splits=n_splits).split(X):
+        X_train = X[train_idx]
+        mean = X_train.mean(axis=0)
+        std = X_train.std(axis=0)
+        std[std == 0] = 1.0
+        folds.append({
+            'Z_train': (X_train - mean) / std,
+            'y_train': y[train_idx],
+            'X_val': X[val_idx],
+            'y_val': y[val_idx],
+            'components': rating_components(X_train, y[train_idx], market_value_scores),
+        })
+    return folds
+
+
+def _init_worker(folds, configs, alphas, num_stocks):
+    _STATE.update(folds=folds, configs=configs, alphas=np.asarray(alphas), num_stocks=num_stocks)
+
+
+def _evaluate(fold_id, config_ids):
+    """Validation tracking error for (configs x alphas) on one fold"""
+    fold = _STATE['folds'][fold_id]
+    alphas = _STATE['alphas']
+    Z, y_train = fold['Z_train'], fold['y_train']
+    X_val, y_val = fold['X_val'], fold['y_val']
+    k = min(_STATE['num_stocks'], Z.shape[1])
+
+    ratings = _STATE['configs'][config_ids] @ fold['components'].T
+    top = np.argpartition(-ratings, k - 1, axis=1)[:, :k]
+
+    # Many rating configurations pick the same names; fit each subset once
+    by_subset = {}
+    errors = np.empty((len(config_ids), len(alphas)))
+    for row, subset in enumerate(top):
+        key = tuple(np.sort(subset))
+        if key not in by_subset:
+            cols = list(key)
+            coefs = ridge_path(Z[:, cols], y_train, alphas)
+            te = np.empty(len(alphas))
+            for a, coef in enumerate(coefs):
+                weights = constrain_weights(coef, 1.0 / (2 * k), MAX_WEIGHT)
+                te[a] = (X_val[:, cols] @ weights - y_val).std()
+            by_subset[key] = te
+        errors[row] = by_subset[key]
+    return fold_id, config_ids, errors
+
+
+def grid_configs(grid=None):
+    grid = grid or DEFAULT_GRID
+    mesh = np.meshgrid(*[np.asarray(grid[p], dtype=float) for p in RATING_PARAMS], indexing='ij')
+    return np.column_stack([m.ravel() for m in mesh])
+
+
+def random_configs(n_iter, seed=0):
+    rng = np.random.default_rng(seed)
+    columns = []
+    for param in RATING_PARAMS:
+        low, high = RANDOM_RANGES[param]
+        columns.append(np.exp(rng.uniform(np.log(low), np.log(high), n_iter)))
+    return np.column_stack(columns)
+
+
+def search(X, y, market_value_scores, num_stocks, configs, alphas=None,
+           n_splits=5, max_workers=None, top_n=10):
+    """
+    Score every (rating weights, alpha) pair and return them best-first.
+
+    Work is split into (fold, chunk of configs) tasks across a process pool;
+    each worker receives the pre-standardised fold matrices once.
+    """
+    alphas = list(alphas or DEFAULT_ALPHAS)
+    configs = np.asarray(configs, dtype=float)
+    folds = make_folds(X, y, np.asarray(market_value_scores, dtype=float), n_splits)
+    max_workers = max_workers or os.cpu_count() or 1
+
+    n_chunks = max(1, min(len(configs), max_workers * 4 // len(folds) or 1))
+    chunks = np.array_split(np.arange(len(configs)), n_chunks)
+    errors = np.zeros((len(folds), len(configs), len(alphas)))
+
+    started = time.time()
+    init_args = (folds, configs, alphas, num_stocks)
+    if max_workers == 1:
+        _init_worker(*init_args)
+        results = [_evaluate(f, ids) for f in range(len(folds)) for ids in chunks]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=init_args
+        ) as executor:
+            futures = [executor.submit(_evaluate, f, ids) for f in range(len(folds)) for ids in chunks]
+            results = [future.result() for future in futures]
+    for fold_id, config_ids, fold_errors in results:
+        errors[fold_id, config_ids] = fold_errors
+
+    mean_errors = errors.mean(axis=0)
+    order = np.argsort(mean_errors, axis=None)[:top_n]
+    ranked = []
+    for flat in order:
+        c, a = np.unravel_index(flat, mean_errors.shape)
+        entry = dict(zip(RATING_PARAMS, configs[c].tolist()))
+        entry['ridge_alpha'] = alphas[a]
+        entry['cv_tracking_error'] = float(mean_errors[c, a])
+        ranked.append(entry)
+    print(f"🔧 Evaluated {len(configs)} rating configs x {len(alphas)} alphas x {len(folds)} folds "
+          f"in {time.time() - started:.1f}s")
+    return ranked
+
+
+def save_config(config, path=TUNED_CONFIG_PATH):
+    """Persist the tuned configuration atomically"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(config, f, indent=2)
+    os.replace(tmp_path, path)
+    print(f"💾 Saved tuned configuration to {path}")
+
+
+def load_config(path=TUNED_CONFIG_PATH):
+    """Tuned configuration from disk, or None if there is none"""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def tune(analyzer, tickers, num_stocks=24, frequency=None, search_mode='random',
+         n_iter=200, alphas=None, n_splits=5, max_workers=None, seed=0):
+    """Run the search for an analyzer's universe and return the result document"""
+    frequency = analyzer._resolve_frequency(frequency)
+    ratings_df = analyzer.rate_stocks(tickers, frequency)
+    if ratings_df.empty:
+        raise ValueError("No stocks could be rated")
+    candidates = ratings_df['Ticker'].tolist()
+    X, y = analyzer.get_training_matrix(candidates, frequency)
+    if len(y) < 2 * (n_splits + 1):
+        raise ValueError(f"Only {len(y)} observations; too few for {n_splits} folds")
+
+    configs = grid_configs() if search_mode == 'grid' else random_configs(n_iter, seed)
+    ranked = search(X, y, ratings_df['Market_Value_Score'].to_numpy(), num_stocks, configs,
+                    alphas=alphas, n_splits=n_splits, max_workers=max_workers)
+    return {
+        'best': ranked[0],
+        'top': ranked,
+        'frequency': frequency,
+        'num_stocks': num_stocks,
+        'n_candidates': len(candidates),
+        'n_observations': int(len(y)),
+        'search': search_mode,
+        'n_configs': int(len(configs)),
+        'n_splits': n_splits,
+        'tuned_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tune Ridge alpha and rating weights")
+    parser.add_argument('tickers_csv', help="CSV with tickers in the first column")
+    parser.add_argument('--num-stocks', type=int, default=24)
+    parser.add_argument('--frequency', default=None, choices=['1d', '1wk', '1mo'])
+    parser.add_argument('--search', default='random', choices=['random', 'grid'])
+    parser.add_argument('--n-iter', type=int, default=200)
+    parser.add_argument('--n-splits', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--header', action='store_true', help="First row of the CSV is a header, not a ticker")
+    parser.add_argument('--output', default=TUNED_CONFIG_PATH)
+    parser.add_argument('--dry-run', action='store_true', help="Print results without saving")
+    args = parser.parse_args(argv)
+
+    from app import analyzer, symbol_directory
+    from symbols import screen_csv
+
+    with open(args.tickers_csv, 'rb') as f:
+        screen = screen_csv(f, symbol_directory, header=args.header)
+    tickers, _ = analyzer.remove_unwanted(screen.accepted)
+    result = tune(analyzer, tickers, args.num_stocks, args.frequency, args.search,
+                  args.n_iter, n_splits=args.n_splits, max_workers=args.workers, seed=args.seed)
+    print(json.dumps(result['best'], indent=2))
+    if not args.dry_run:
+        save_config(result, args.output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -6,11 +6,23 @@ echo "🔨 Building MarketMatch..."
 echo "📦 Installing Python dependencies..."
 pip install -r backend/requirements.txt
 
+# Refresh the local symbol directory (rejects unknown tickers before any fetch)
+echo "📒 Downloading symbol listings..."
+(cd backend && python symbols.py download) || echo "⚠️  Symbol directory refresh failed; the server will warn and rely on live lookups"
+
 # Build frontend
 echo "🎨 Building React frontend..."
 cd frontend
 npm install
 npm run build
+
+# Precompress text assets at maximum level so the server only has to fill gaps
+echo "🗜️  Precompressing build assets..."
+TEXT_ASSETS=(-type f \( -name '*.js' -o -name '*.css' -o -name '*.html' -o -name '*.json' -o -name '*.map' -o -name '*.svg' -o -name '*.txt' \))
+find build "${TEXT_ASSETS[@]}" -size +1k -exec gzip -k -f -9 {} \;
+if command -v brotli >/dev/null 2>&1; then
+  find build "${TEXT_ASSETS[@]}" -size +1k -exec brotli -k -f -q 11 {} \;
+fi
 cd ..
 
 echo "✅ Build complete!"